@@ -0,0 +1,465 @@
+"""
+Benchmark offline do Apex Assistant.
+
+Roda os handlers reais do bot.py contra a Bot API falsa (fake_bot_api.py), um
+tradutor falso com latência configurável e um servidor RSS local, e grava um
+JSON com vazão, latências p50/p95/p99 e chamadas externas de cada cenário:
+
+    python bench.py --translator-latency 0.15 --api-latency 0.03 --output bench.json
+    python bench.py --baseline bench.json   # compara com uma execução anterior
+
+Cenários: rajada de mensagens nos grupos, raid de entradas, enxurrada de
+callbacks, ciclos de notícias e broadcast.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import fake_bot_api
+from fake_bot_api import FakeBotAPI, callback_update, join_update, text_update
+
+MAIN_GROUP_BASE = -1001000000000
+PAMM_GROUP = -1009999999999
+
+GROUP_PHRASES = [
+    "gm", "good morning everyone", "thanks", "welcome guys", "Gold is pumping now",
+    "What do you think about the Fed decision today?", "Bom dia galera!",
+    "¿Cuándo abre el mercado?", "XAUUSD 2350.5", "🚀🚀🚀", "https://example.com/chart",
+    "TP1 2345 SL 2330", "Great call on that trade, thank you!",
+]
+CALLBACK_DATA = ["lang_en", "lang_pt", "lang_es", "pamm_info", "no_thanks", "lang_pt_pamm"]
+HEADLINE_WORDS = "gold silver dollar fed yields rally slips rises falls inflation jobs data ahead record".split()
+
+
+# ─── Dublês ─────────────────────────────────────────────────────────────────────
+
+class FakeTranslator:
+    """Imita o GoogleTranslator: dorme `latency` segundos e marca o texto com o idioma.
+
+    Num lote (textos unidos por `separator`), cada texto é marcado, como o tradutor
+    de verdade faria.
+    """
+
+    calls = 0
+    characters = 0
+    latency = 0.0
+    separator = "\n###\n"  # run() troca pelo bot.BATCH_SEPARATOR
+    _lock = threading.Lock()
+
+    def __init__(self, source: str = "auto", target: str = "en", **kwargs):
+        self.target = target
+
+    def translate(self, text: str, **kwargs) -> str:
+        with FakeTranslator._lock:
+            FakeTranslator.calls += 1
+            FakeTranslator.characters += len(text)
+        time.sleep(FakeTranslator.latency)
+        return FakeTranslator.separator.join(f"[{self.target}] {part}" for part in text.split(FakeTranslator.separator))
+
+
+class FakeRSSServer:
+    """Feed RSS local com ETag; add_items() publica manchetes novas."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        self._items: list = []
+        self._version = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/metals.rss"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_items(self, count: int):
+        with self._lock:
+            for _ in range(count):
+                n = len(self._items) + 1
+                title = " ".join(random.sample(HEADLINE_WORDS, 6)).capitalize() + f" #{n}"
+                self._items.insert(0, (f"bench-{n}", title))
+            self._version += 1
+
+    def _body(self) -> bytes:
+        items = "".join(
+            f"<item><title>{title}</title><link>https://example.com/{guid}</link><guid>{guid}</guid></item>"
+            for guid, title in self._items[:20]
+        )
+        return f'<?xml version="1.0"?><rss version="2.0"><channel><title>bench</title>{items}</channel></rss>'.encode()
+
+    def _handler(self):
+        rss = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if rss.latency:
+                    time.sleep(rss.latency)
+                with rss._lock:
+                    rss.requests += 1
+                    etag = f'"v{rss._version}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        rss.not_modified += 1
+                        self.send_response(304)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    body = rss._body()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+# ─── Medição ────────────────────────────────────────────────────────────────────
+
+def percentile(values: list, pct: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: list, duration: float, items: int, outbound: dict,
+              expected: int = None) -> dict:
+    """`expected` é quantos itens deveriam ter resposta (padrão: todos); os que
+    ficaram sem resposta aparecem em "missing" e fazem o bench falhar."""
+    latencies_ms = [value * 1000 for value in latencies]
+    expected = items if expected is None else expected
+    return {
+        "scenario": name,
+        "items": items,
+        "expected": expected,
+        "completed": len(latencies),
+        "missing": expected - len(latencies),
+        "duration_s": round(duration, 3),
+        "throughput_per_s": round(items / duration, 2) if duration else None,
+        "latency_ms": {
+            "p50": _round(percentile(latencies_ms, 50)),
+            "p95": _round(percentile(latencies_ms, 95)),
+            "p99": _round(percentile(latencies_ms, 99)),
+            "max": _round(max(latencies_ms) if latencies_ms else None),
+        },
+        "outbound": outbound,
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+class Snapshot:
+    """Contadores externos antes de um cenário, para reportar só a diferença."""
+
+    def __init__(self, api: FakeBotAPI, rss: FakeRSSServer):
+        self.api, self.rss = api, rss
+        self.api_calls = len(api.calls)
+        self.translator_calls = FakeTranslator.calls
+        self.rss_requests = rss.requests
+
+    def outbound(self) -> dict:
+        methods: dict = {}
+        for method, _, _ in self.api.calls[self.api_calls:]:
+            methods[method] = methods.get(method, 0) + 1
+        return {
+            "telegram": methods,
+            "telegram_total": sum(methods.values()),
+            "translator": FakeTranslator.calls - self.translator_calls,
+            "rss": self.rss.requests - self.rss_requests,
+        }
+
+
+def _reply_key(params: dict):
+    reply = params.get("reply_parameters") or {}
+    return params.get("chat_id"), reply.get("message_id") or params.get("reply_to_message_id")
+
+
+async def _wait_until(condition, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        await asyncio.sleep(0.02)
+    return False
+
+
+# ─── Cenários ───────────────────────────────────────────────────────────────────
+
+async def _feed(app, bot_module, updates: list):
+    from telegram import Update
+    posted = {}
+    for data in updates:
+        posted[data["update_id"]] = time.monotonic()
+        await app.update_queue.put(Update.de_json(data, app.bot))
+    return posted
+
+
+async def scenario_group_burst(app, bot_module, api, rss, args):
+    snapshot = Snapshot(api, rss)
+    updates = [
+        text_update(MAIN_GROUP_BASE - i % args.groups, random.choice(GROUP_PHRASES) if i % 3 else f"Signal update {i}")
+        for i in range(args.messages)
+    ]
+    started = time.monotonic()
+    posted = await _feed(app, bot_module, updates)
+    await app.update_queue.join()
+    duration = time.monotonic() - started
+
+    sent_at = {}
+    for method, params, at in api.calls[snapshot.api_calls:]:
+        if method == "sendMessage":
+            sent_at.setdefault(_reply_key(params), at)
+    # Só emoji, link, ticker ou número não tem idioma detectado e não recebe resposta
+    expected = [data for data in updates if bot_module.detect_language(data["message"]["text"]) is not None]
+    latencies = []
+    for data in expected:
+        key = (data["message"]["chat"]["id"], data["message"]["message_id"])
+        if key in sent_at:
+            latencies.append(sent_at[key] - posted[data["update_id"]])
+    return summarize("group_burst", latencies, duration, len(updates), snapshot.outbound(), expected=len(expected))
+
+
+async def scenario_join_storm(app, bot_module, api, rss, args):
+    snapshot = Snapshot(api, rss)
+    groups = [MAIN_GROUP_BASE, PAMM_GROUP]
+    updates = [join_update(groups[i % 2], 500000 + i, f"Trader{i}") for i in range(args.joins)]
+    started = time.monotonic()
+    posted = await _feed(app, bot_module, updates)
+    await app.update_queue.join()
+    await _wait_until(bot_module.join_coalescer.idle, timeout=bot_module.JOIN_WINDOW + 60)
+    duration = time.monotonic() - started
+
+    welcomed = {}
+    for method, params, at in api.calls[snapshot.api_calls:]:
+        if method == "sendMessage":
+            for data in updates:
+                user_id = data["chat_member"]["new_chat_member"]["user"]["id"]
+                if f"tg://user?id={user_id})" in params.get("text", ""):
+                    welcomed.setdefault(user_id, at)
+    latencies = [
+        welcomed[data["chat_member"]["new_chat_member"]["user"]["id"]] - posted[data["update_id"]]
+        for data in updates if data["chat_member"]["new_chat_member"]["user"]["id"] in welcomed
+    ]
+    return summarize("join_storm", latencies, duration, len(updates), snapshot.outbound())
+
+
+async def scenario_callback_flood(app, bot_module, api, rss, args):
+    snapshot = Snapshot(api, rss)
+    updates = [callback_update(700000 + i, CALLBACK_DATA[i % len(CALLBACK_DATA)]) for i in range(args.callbacks)]
+    started = time.monotonic()
+    posted = await _feed(app, bot_module, updates)
+    await app.update_queue.join()
+    duration = time.monotonic() - started
+
+    edited = {}
+    for method, params, at in api.calls[snapshot.api_calls:]:
+        if method == "editMessageText":
+            edited.setdefault(params.get("chat_id"), at)
+    latencies = [
+        edited[data["callback_query"]["from"]["id"]] - posted[data["update_id"]]
+        for data in updates if data["callback_query"]["from"]["id"] in edited
+    ]
+    return summarize("callback_flood", latencies, duration, len(updates), snapshot.outbound())
+
+
+async def scenario_news_ticks(app, bot_module, api, rss, args):
+    snapshot = Snapshot(api, rss)
+    ctx = SimpleNamespace(bot=app.bot, application=app, job_queue=app.job_queue)
+    latencies = []
+    started = time.monotonic()
+    for tick in range(args.news_ticks):
+        if tick % 2 == 0:
+            rss.add_items(args.news_items)  # ciclos ímpares encontram o feed sem mudança (304)
+        tick_started = time.monotonic()
+        await bot_module.check_news_job(ctx)
+        latencies.append(time.monotonic() - tick_started)
+    duration = time.monotonic() - started
+    return summarize("news_ticks", latencies, duration, args.news_ticks, snapshot.outbound())
+
+
+async def scenario_broadcast(app, bot_module, api, rss, args):
+    for i in range(args.broadcast_chats):
+        bot_module.active_chats.add(MAIN_GROUP_BASE - 10000 - i)
+    snapshot = Snapshot(api, rss)
+    ctx = SimpleNamespace(bot=app.bot, application=app, job_queue=app.job_queue)
+    started = time.monotonic()
+    await bot_module.broadcast_job(ctx)
+    duration = time.monotonic() - started
+    # Uma rodada só: a latência é a duração do broadcast inteiro
+    return summarize("broadcast", [duration], duration, len(bot_module.active_chats), snapshot.outbound(), expected=1)
+
+
+SCENARIOS = {
+    "group_burst": scenario_group_burst,
+    "join_storm": scenario_join_storm,
+    "callback_flood": scenario_callback_flood,
+    "news_ticks": scenario_news_ticks,
+    "broadcast": scenario_broadcast,
+}
+
+
+# ─── Execução ───────────────────────────────────────────────────────────────────
+
+def _configure_environment(args, rss: FakeRSSServer, workdir: str):
+    """O bot lê a configuração no import, então o ambiente é montado antes."""
+    os.environ.update({
+        "BOT_TOKEN": "123456:BENCH",
+        "PAMM_GROUP_ID": str(PAMM_GROUP),
+        "STATE_BACKEND": "memory",
+        "TRANSLATION_CACHE_DB": "",
+        "NEWS_DB": "",
+        "FEED_STATE_FILE": "",
+        "NEWS_FEEDS": json.dumps([
+            {"name": "gold", "label": "XAUUSD — Market News", "url": rss.url, "chats": [PAMM_GROUP]},
+        ]),
+    })
+    if args.no_rate_limits:
+        os.environ.update({"BROADCAST_GLOBAL_RATE": "100000", "BROADCAST_CHAT_RATE": "100000"})
+    os.chdir(workdir)
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path, "r") as f:
+        baseline = {s["scenario"]: s for s in json.load(f)["scenarios"]}
+    print(f"\nComparação com {baseline_path}:")
+    for scenario in results["scenarios"]:
+        old = baseline.get(scenario["scenario"])
+        if not old:
+            continue
+        for label, new_value, old_value in (
+            ("p95", scenario["latency_ms"]["p95"], old["latency_ms"]["p95"]),
+            ("vazão", scenario["throughput_per_s"], old["throughput_per_s"]),
+            ("chamadas", scenario["outbound"]["telegram_total"] + scenario["outbound"]["translator"],
+             old["outbound"]["telegram_total"] + old["outbound"]["translator"]),
+        ):
+            if new_value is None or not old_value:
+                continue
+            delta = (new_value - old_value) / old_value * 100
+            print(f"  {scenario['scenario']:<15} {label:<9} {old_value:>10} -> {new_value:>10} ({delta:+.1f}%)")
+
+
+async def run(args) -> dict:
+    random.seed(args.seed)
+    FakeTranslator.latency = args.translator_latency
+    rss = FakeRSSServer(latency=args.rss_latency).start()
+    api = FakeBotAPI(latency=args.api_latency).start()
+    original_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="apex-bench-")
+    _configure_environment(args, rss, workdir)
+    try:
+        return await _run_scenarios(args, api, rss)
+    finally:
+        api.stop()
+        rss.stop()
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+async def _run_scenarios(args, api: FakeBotAPI, rss: FakeRSSServer) -> dict:
+    import bot as bot_module
+    FakeTranslator.separator = bot_module.BATCH_SEPARATOR
+    bot_module.translation_router.set_providers([bot_module.DeepTranslatorProvider("fake", FakeTranslator)])
+
+    app = bot_module.build_application(base_url=api.base_url)
+    for job in app.job_queue.jobs():
+        job.schedule_removal()  # os jobs rodam sob demanda nos cenários
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    await app.start()
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "scenarios": [],
+    }
+    try:
+        for name in args.scenarios:
+            print(f"▶ {name}...", file=sys.stderr)
+            result = await SCENARIOS[name](app, bot_module, api, rss, args)
+            results["scenarios"].append(result)
+            lat = result["latency_ms"]
+            print(
+                f"  {result['items']} itens em {result['duration_s']}s ({result['throughput_per_s']}/s) | "
+                f"p50 {lat['p50']}ms p95 {lat['p95']}ms p99 {lat['p99']}ms | "
+                f"telegram {result['outbound']['telegram_total']} tradutor {result['outbound']['translator']} "
+                f"rss {result['outbound']['rss']}"
+                + (f" | ⚠ {result['missing']} sem resposta" if result["missing"] else ""),
+                file=sys.stderr,
+            )
+        results["translation_cache"] = bot_module.translation_cache.stats()
+        results["translation_batches"] = bot_module.translation_batcher.stats()
+    finally:
+        await fake_bot_api.stop_app(app)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--messages", type=int, default=300, help="mensagens na rajada dos grupos")
+    parser.add_argument("--groups", type=int, default=5, help="grupos recebendo a rajada")
+    parser.add_argument("--joins", type=int, default=200, help="entradas no raid")
+    parser.add_argument("--callbacks", type=int, default=200, help="callbacks na enxurrada")
+    parser.add_argument("--news-ticks", type=int, default=4, help="verificações de notícias")
+    parser.add_argument("--news-items", type=int, default=3, help="manchetes novas a cada ciclo par")
+    parser.add_argument("--broadcast-chats", type=int, default=50, help="grupos extras no broadcast")
+    parser.add_argument("--api-latency", type=float, default=0.03, help="latência da Bot API falsa (s)")
+    parser.add_argument("--translator-latency", type=float, default=0.15, help="latência do tradutor falso (s)")
+    parser.add_argument("--rss-latency", type=float, default=0.2, help="latência do servidor RSS (s)")
+    parser.add_argument("--no-rate-limits", action="store_true", help="desliga os limites de envio do bot")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="arquivo JSON de saída")
+    parser.add_argument("--baseline", default=None, help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output or f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    results = asyncio.run(run(args))
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {output}", file=sys.stderr)
+    if baseline:
+        compare(results, baseline)
+    missing = {s["scenario"]: s["missing"] for s in results["scenarios"] if s["missing"]}
+    if missing:
+        # Percentis calculados só sobre quem respondeu esconderiam a falha
+        sys.exit(f"\nItens sem resposta: {missing}")
+
+
+if __name__ == "__main__":
+    main()
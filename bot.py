@@ -4,20 +4,45 @@ Grupo 1 (Apex Golden Community): traduções + boas-vindas com fluxo de venda +
 Grupo 2 (Apex Golden Capital - PAMM): traduções + boas-vindas simples + notícias XAUUSD via RSS
 """
 
+import asyncio
+import contextvars
+import functools
+import hashlib
+import heapq
+import itertools
+import json
 import logging
 import os
-import feedparser
-from datetime import datetime, timezone
+import random
+import re
+import socket
+import signal
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import types
+import httpx
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+from urllib.parse import quote
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 from telegram import (
     Update, InlineKeyboardButton, InlineKeyboardMarkup,
     ChatMemberUpdated
 )
+from telegram.request import HTTPXRequest
+from telegram.error import BadRequest, ChatMigrated, Forbidden, NetworkError, RetryAfter, TimedOut
 from telegram.ext import (
-    Application, CommandHandler, MessageHandler, CallbackQueryHandler,
+    Application, BaseUpdateProcessor, CommandHandler, MessageHandler, CallbackQueryHandler,
     ChatMemberHandler, filters, ContextTypes
 )
-from deep_translator import GoogleTranslator
 
 load_dotenv()
 
@@ -35,41 +60,1530 @@ PAMM_LINK          = os.getenv("PAMM_LINK", "https://LINK_DA_CONTA_PAMM_AQUI")
 BROADCAST_INTERVAL = int(os.getenv("BROADCAST_INTERVAL", "14400"))
 BOT_USERNAME       = os.getenv("BOT_USERNAME", "apexghost_fx_bot")
 
+# Máximo de traduções simultâneas por provedor (chamadas HTTP bloqueantes rodam fora do event loop)
+TRANSLATE_WORKERS  = int(os.getenv("TRANSLATE_WORKERS", "8"))
+
+# Cache de traduções: LRU em memória na frente de um SQLite que sobrevive a restarts
+TRANSLATION_CACHE_DB   = os.getenv("TRANSLATION_CACHE_DB", "translations.db")
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))
+TRANSLATION_CACHE_TTL  = int(os.getenv("TRANSLATION_CACHE_TTL", "604800"))  # 7 dias
+
+# Micro-batching: junta textos pendentes por alguns ms e traduz tudo numa chamada só
+TRANSLATE_BATCH_WINDOW_MS = int(os.getenv("TRANSLATE_BATCH_WINDOW_MS", "40"))  # 0 desliga
+TRANSLATE_BATCH_MAX_SIZE  = int(os.getenv("TRANSLATE_BATCH_MAX_SIZE", "16"))
+TRANSLATE_BATCH_MAX_CHARS = 4500  # GoogleTranslator recusa payloads com 5000+ caracteres
+
+# Textos maiores que isso são quebrados em frases e os pedaços traduzidos em paralelo
+TRANSLATE_CHUNK_CHARS = int(os.getenv("TRANSLATE_CHUNK_CHARS", "400"))
+
+# Provedores de tradução em ordem de preferência: google, mymemory ou stub (local, sem rede)
+TRANSLATE_PROVIDERS   = [p.strip() for p in os.getenv("TRANSLATE_PROVIDERS", "google,mymemory").split(",") if p.strip()]
+TRANSLATE_TIMEOUT     = float(os.getenv("TRANSLATE_TIMEOUT", "5"))  # prazo de cada chamada, em segundos
+# Se o primeiro provedor não responder em TRANSLATE_HEDGE_AFTER segundos, chama o próximo em paralelo (0 desliga)
+TRANSLATE_HEDGE_AFTER = float(os.getenv("TRANSLATE_HEDGE_AFTER", "0"))
+# Circuit breaker: depois de CIRCUIT_FAILURES erros seguidos o provedor fica CIRCUIT_RESET segundos de fora
+CIRCUIT_FAILURES      = int(os.getenv("CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET         = float(os.getenv("CIRCUIT_RESET", "30"))
+
+# Idiomas suportados pelo bot e destinos padrão das traduções a partir do inglês
+SUPPORTED_LANGS    = ("en", "pt", "es")
+TRANSLATE_TARGETS  = ("pt", "es")
+LANG_FLAGS         = {"en": "🇬🇧", "pt": "🇧🇷", "es": "🇪🇸"}
+
+# Broadcast: limites do Telegram (~30 msg/s no total, ~20 msg/min por grupo)
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+BROADCAST_GLOBAL_RATE = float(os.getenv("BROADCAST_GLOBAL_RATE", "25"))
+BROADCAST_CHAT_RATE   = float(os.getenv("BROADCAST_CHAT_RATE", "0.33"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "4"))
+
+# Modo de execução: "polling" (padrão) ou "webhook" com servidor HTTP embutido
+RUN_MODE        = os.getenv("RUN_MODE", "polling")
+BOT_API_URL     = os.getenv("BOT_API_URL", "https://api.telegram.org/bot")
+WEBHOOK_URL     = os.getenv("WEBHOOK_URL", "")  # URL pública do bot, ex.: https://apex.example.com
+WEBHOOK_LISTEN  = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT    = int(os.getenv("PORT", "8443"))
+WEBHOOK_PATH    = os.getenv("WEBHOOK_PATH", "telegram")
+# Conferido no header X-Telegram-Bot-Api-Secret-Token; sem valor, deriva do token do bot
+WEBHOOK_SECRET  = os.getenv("WEBHOOK_SECRET") or hashlib.sha256((BOT_TOKEN or "").encode()).hexdigest()[:32]
+
+# Cluster: várias instâncias em modo webhook dividindo STATE_DB e NEWS_DB (mesmo disco).
+# Todas atendem updates; só a que tem o lease de líder roda broadcast e notícias.
+CLUSTER_MODE    = os.getenv("CLUSTER_MODE", "false").lower() in ("1", "true", "yes")
+INSTANCE_ID     = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+LEADER_LEASE    = float(os.getenv("LEADER_LEASE", "30"))  # segundos; renovado a cada 1/3 disso
+
+# Boas-vindas agrupadas: entradas no mesmo grupo dentro da janela viram uma mensagem só
+JOIN_WINDOW             = float(os.getenv("JOIN_WINDOW", "3"))  # segundos; 0 = uma mensagem por entrada
+JOIN_MAX_MENTIONS       = int(os.getenv("JOIN_MAX_MENTIONS", "30"))
+DELETE_PREVIOUS_WELCOME = os.getenv("DELETE_PREVIOUS_WELCOME", "false").lower() in ("1", "true", "yes")
+MESSAGE_MAX_LENGTH      = 4096
+
+# Respostas de tradução progressivas: a primeira pronta sai na hora e as outras entram por edição
+STREAMING_REPLIES = os.getenv("STREAMING_REPLIES", "true").lower() in ("1", "true", "yes")
+
+# Métricas no formato do Prometheus em http://METRICS_LISTEN:METRICS_PORT/metrics (0 desliga)
+METRICS_PORT    = int(os.getenv("METRICS_PORT", "0"))
+METRICS_LISTEN  = os.getenv("METRICS_LISTEN", "0.0.0.0")
+# Usuários que recebem o /status detalhado (além do OWNER_USERNAME)
+ADMIN_IDS       = {int(x) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()}
+
+# Idiomas extras (além de en/pt/es): cada LOCALES_DIR/<idioma>.json vira um botão no
+# menu de idiomas, e os textos são carregados na primeira vez em que o idioma é escolhido
+LOCALES_DIR     = os.getenv("LOCALES_DIR", "locales")
+
+# Updates processados em paralelo (1 = sequencial); a ordem dentro de cada chat é mantida
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "16"))
+UPDATE_MAX_PENDING = int(os.getenv("UPDATE_MAX_PENDING", "512"))
+
+# SIGTERM drena o trabalho em andamento por até DRAIN_TIMEOUT segundos (o Heroku mata em 30s)
+DRAIN_TIMEOUT      = float(os.getenv("DRAIN_TIMEOUT", "20"))
+
 # IDs dos grupos
 PAMM_GROUP_ID      = int(os.getenv("PAMM_GROUP_ID", "-5220645085"))  # Apex Golden Capital - PAMM
 
 # RSS feed de Metais (Ouro/XAUUSD) da Investing.com
 XAUUSD_RSS = "https://www.investing.com/rss/commodities_Metals.rss"
 
-# Arquivo para persistir notícias já enviadas entre restarts
-SENT_NEWS_FILE = "sent_news.txt"
-
-def load_sent_news() -> set:
-    if os.path.exists(SENT_NEWS_FILE):
+# Feeds de notícias e para quais chats cada um vai. NEWS_FEEDS (JSON) substitui o padrão, ex.:
+# [{"name": "gold", "label": "XAUUSD — Market News", "url": "https://...", "chats": [-100...], "limit": 5},
+#  {"name": "fed", "label": "Fed — Market News", "url": "https://...", "chats": [-100...]}]
+NEWS_FEEDS = json.loads(os.getenv("NEWS_FEEDS") or "null") or [
+    {"name": "gold", "label": "XAUUSD — Market News", "url": XAUUSD_RSS, "chats": [PAMM_GROUP_ID], "limit": 5},
+]
+for _feed in NEWS_FEEDS:
+    _feed.setdefault("label", _feed["name"])
+    _feed.setdefault("limit", 5)
+    _feed["chats"] = [int(c) for c in _feed.get("chats", [PAMM_GROUP_ID])]
+
+# Agenda adaptativa das notícias: intervalo (s) conforme o horário do mercado de ouro (em MARKET_TIMEZONE)
+MARKET_TIMEZONE        = ZoneInfo(os.getenv("MARKET_TIMEZONE", "America/New_York"))
+NEWS_INTERVAL_RELEASE  = float(os.getenv("NEWS_INTERVAL_RELEASE", "30"))    # em volta das divulgações
+NEWS_INTERVAL_ACTIVE   = float(os.getenv("NEWS_INTERVAL_ACTIVE", "120"))    # Londres + Nova York
+NEWS_INTERVAL_IDLE     = float(os.getenv("NEWS_INTERVAL_IDLE", "600"))      # Ásia e pausa diária
+NEWS_INTERVAL_CLOSED   = float(os.getenv("NEWS_INTERVAL_CLOSED", "3600"))   # fim de semana
+NEWS_INTERVAL_MAX      = float(os.getenv("NEWS_INTERVAL_MAX", "3600"))      # teto do backoff
+# Horários (dias úteis) de divulgações de alto impacto: payroll/CPI 08:30, ISM 10:00, FOMC 14:00
+NEWS_RELEASE_TIMES     = [t.strip() for t in os.getenv("NEWS_RELEASE_TIMES", "08:30,10:00,14:00").split(",") if t.strip()]
+NEWS_RELEASE_WINDOW    = (5, 20)  # minutos antes e depois de cada divulgação
+
+# Envios simultâneos de notícias (o rate limit por chat continua valendo)
+NEWS_SEND_WORKERS  = int(os.getenv("NEWS_SEND_WORKERS", "4"))
+
+# GET condicional do RSS: ETag/Last-Modified persistidos entre restarts
+FEED_STATE_FILE    = os.getenv("FEED_STATE_FILE", "feed_state.json")
+NEWS_FETCH_TIMEOUT = float(os.getenv("NEWS_FETCH_TIMEOUT", "10"))
+
+# Notícias já enviadas: janela limitada em SQLite (sent_news.txt antigo é migrado uma vez)
+SENT_NEWS_FILE      = "sent_news.txt"
+NEWS_DB             = os.getenv("NEWS_DB", "news.db")
+NEWS_RETENTION_DAYS = int(os.getenv("NEWS_RETENTION_DAYS", "30"))
+NEWS_MAX_ENTRIES    = int(os.getenv("NEWS_MAX_ENTRIES", "20000"))
+# A mesma manchete em outro feed só é descartada por algumas horas: títulos genéricos
+# ("Gold prices rise") voltam a ser notícia depois, com outro ID
+NEWS_FINGERPRINT_HOURS = float(os.getenv("NEWS_FINGERPRINT_HOURS", "6"))
+# Cópia binária da janela de notícias gravada no desligamento; acelera o próximo start
+NEWS_SNAPSHOT       = os.getenv("NEWS_SNAPSHOT", NEWS_DB + ".snapshot" if NEWS_DB else "")
+
+
+class SentNewsStore:
+    """Conjunto de IDs de notícias já enviadas, limitado por tempo e por tamanho.
+
+    Em memória ficam só hashes de 64 bits da janela de retenção; as gravações
+    ficam pendentes até flush(), que grava tudo numa transação só.
+
+    Nada é lido no import: load() roda no aquecimento, já com o bot no ar. Ele
+    parte do snapshot binário gravado no desligamento e só busca no SQLite o que
+    foi enviado depois dele.
+    """
+
+    SNAPSHOT_MAGIC = b"APXN1"
+
+    def __init__(self, path: str, retention_days: int, max_entries: int, snapshot_path: str = None):
+        self.retention = retention_days * 86400
+        self.max_entries = max_entries
+        self.snapshot_path = snapshot_path
+        self.loaded = False
+        self._seen: dict = {}  # hash -> timestamp do envio
+        self._pending: list = []
+        self._synced_at = 0.0  # maior sent_at já lido do banco
+        self._load_lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sent_news (key INTEGER PRIMARY KEY, sent_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS sent_news_sent_at ON sent_news (sent_at)")
+
+    @staticmethod
+    def _hash(news_id: str) -> int:
+        return int.from_bytes(hashlib.blake2b(news_id.encode(), digest_size=8).digest(), "big", signed=True)
+
+    def load(self):
+        """Carrega a janela de retenção (uma vez só; seguro chamar de outra thread)."""
+        with self._load_lock:
+            if self.loaded:
+                return
+            seen = self._read_snapshot()
+            self._seen = {**seen, **self._read_db(max(seen.values(), default=0.0))}
+            self._synced_at = max(self._seen.values(), default=0.0)
+            self._prune()
+            self.loaded = True
+        self._migrate_legacy_file()
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def _read_snapshot(self) -> dict:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return {}
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = f.read()
+            if not data.startswith(self.SNAPSHOT_MAGIC):
+                raise ValueError("formato desconhecido")
+            (count,) = struct.unpack_from("<I", data, len(self.SNAPSHOT_MAGIC))
+            offset = len(self.SNAPSHOT_MAGIC) + 4
+            keys, times = array("q"), array("d")
+            keys.frombytes(data[offset:offset + count * 8])
+            times.frombytes(data[offset + count * 8:offset + count * 16])
+            if len(keys) != count or len(times) != count:
+                raise ValueError("arquivo truncado")
+            return dict(zip(keys, times))
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Snapshot de notícias ignorado ({e}), lendo tudo do banco")
+            return {}
+
+    def _read_db(self, since: float) -> dict:
+        if self._db is None:
+            return {}
+        cutoff = time.time() - self.retention
+        rows = self._db.execute(
+            "SELECT key, sent_at FROM sent_news WHERE sent_at >= ? ORDER BY sent_at DESC LIMIT ?",
+            (max(since, cutoff), self.max_entries),
+        ).fetchall()
+        return dict(reversed(rows))
+
+    def save_snapshot(self):
+        """Grava hashes e horários em arrays binários para o próximo start ser rápido."""
+        if not self.snapshot_path or not self.loaded:
+            return
+        items = sorted(self._seen.items(), key=lambda item: item[1])
+        keys = array("q", (k for k, _ in items))
+        times = array("d", (t for _, t in items))
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.SNAPSHOT_MAGIC + struct.pack("<I", len(keys)))
+            f.write(keys.tobytes())
+            f.write(times.tobytes())
+        os.replace(tmp, self.snapshot_path)
+
+    def _migrate_legacy_file(self):
+        if not os.path.exists(SENT_NEWS_FILE):
+            return
         with open(SENT_NEWS_FILE, "r") as f:
-            return set(line.strip() for line in f if line.strip())
-    return set()
+            for line in f:
+                if line.strip():
+                    self.add(line.strip())
+        self.flush()
+        os.replace(SENT_NEWS_FILE, SENT_NEWS_FILE + ".migrated")
+        logger.info(f"{SENT_NEWS_FILE} migrado para {NEWS_DB}")
+
+    def __contains__(self, news_id: str) -> bool:
+        self._ensure_loaded()
+        return self._hash(news_id) in self._seen
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._seen)
+
+    def sent_within(self, news_id: str, seconds: float) -> bool:
+        """Enviada há menos de `seconds` (para chaves com prazo menor que a retenção)."""
+        self._ensure_loaded()
+        sent_at = self._seen.get(self._hash(news_id))
+        return sent_at is not None and time.time() - sent_at < seconds
+
+    def add(self, news_id: str):
+        self._ensure_loaded()
+        key, now = self._hash(news_id), time.time()
+        self._seen.pop(key, None)
+        self._seen[key] = now
+        self._pending.append((key, now))
+        while len(self._seen) > self.max_entries:
+            del self._seen[next(iter(self._seen))]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        while self._seen:
+            oldest = next(iter(self._seen))
+            if self._seen[oldest] >= cutoff:
+                break
+            del self._seen[oldest]
+        while len(self._seen) > self.max_entries:
+            del self._seen[next(iter(self._seen))]
+
+    def flush(self):
+        """Grava os IDs pendentes e descarta o que saiu da janela de retenção."""
+        if not self.loaded:
+            return
+        self._prune()
+        # Troca a lista antes de gravar: o que o loop marcar durante a gravação fica para a próxima
+        pending, self._pending = self._pending, []
+        if self._db is None or not pending:
+            return
+        cutoff = time.time() - self.retention
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO sent_news (key, sent_at) VALUES (?, ?)", pending)
+            self._db.execute("DELETE FROM sent_news WHERE sent_at < ?", (cutoff,))
+            self._db.execute(
+                "DELETE FROM sent_news WHERE key NOT IN "
+                "(SELECT key FROM sent_news ORDER BY sent_at DESC LIMIT ?)", (self.max_entries,)
+            )
+
+    def read_window(self) -> Optional[dict]:
+        """Grava o pendente e relê a janela do disco (outra instância pode ter enviado
+        notícias). Bloqueante: roda fora do loop, e replace() aplica o resultado."""
+        self._ensure_loaded()
+        self.flush()
+        if self._db is None:
+            return None
+        seen = self._read_db(0.0)
+        self._synced_at = max(seen.values(), default=self._synced_at)
+        return seen
+
+    def read_new(self) -> dict:
+        """Só o que entrou no banco desde a última leitura (usa o índice de sent_at).
+        Bloqueante: roda fora do loop, e merge() aplica o resultado."""
+        self._ensure_loaded()
+        if self._db is None:
+            return {}
+        rows = self._read_db(self._synced_at)
+        self._synced_at = max(rows.values(), default=self._synced_at)
+        return rows
+
+    def merge(self, rows: dict):
+        """Acrescenta as notícias que outra instância gravou."""
+        for key, sent_at in rows.items():
+            self._seen.setdefault(key, sent_at)
+
+    def replace(self, seen: Optional[dict]):
+        """Troca a janela em memória, mantendo o que foi marcado depois da leitura."""
+        if seen is None:
+            return
+        for key, sent_at in self._pending:
+            seen.pop(key, None)
+            seen[key] = sent_at
+        self._seen = seen
+
+
+sent_news = SentNewsStore(NEWS_DB, NEWS_RETENTION_DAYS, NEWS_MAX_ENTRIES, NEWS_SNAPSHOT)
+
+# Estado dos chats e idiomas: memória na frente, gravação em lote no backend
+STATE_BACKEND        = os.getenv("STATE_BACKEND", "sqlite")  # sqlite | memory
+STATE_DB             = os.getenv("STATE_DB", "state.db")
+STATE_FLUSH_INTERVAL = int(os.getenv("STATE_FLUSH_INTERVAL", "30"))
+
+
+class WriteBehindSet(set):
+    """set que anota adições e remoções até o próximo flush."""
+
+    def __init__(self, items=()):
+        super().__init__(items)
+        self.dirty: dict = {}  # item -> True (adicionado) / False (removido)
+
+    def replace(self, items):
+        """Troca o conteúdo pelo que veio do backend, sem marcar nada como alterado."""
+        super().clear()
+        super().update(items)
+        for item, added in self.dirty.items():
+            (super().add if added else super().discard)(item)
+
+    def add(self, item):
+        if item not in self:
+            super().add(item)
+            self.dirty[item] = True
+
+    def discard(self, item):
+        if item in self:
+            super().discard(item)
+            self.dirty[item] = False
+
+
+class WriteBehindDict(dict):
+    """dict que anota chaves alteradas até o próximo flush (None = removida)."""
+
+    def __init__(self, items=()):
+        super().__init__(items)
+        self.dirty: dict = {}
+
+    def replace(self, items):
+        """Troca o conteúdo pelo que veio do backend, sem marcar nada como alterado."""
+        super().clear()
+        super().update(items)
+        for key, value in self.dirty.items():
+            if value is None:
+                super().pop(key, None)
+            else:
+                super().__setitem__(key, value)
+
+    def __setitem__(self, key, value):
+        if self.get(key) != value:
+            super().__setitem__(key, value)
+            self.dirty[key] = value
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.dirty[key] = None
+
+
+class MemoryStateBackend:
+    """Sem persistência: o estado some a cada restart (comportamento antigo)."""
+
+    def load(self):
+        return set(), {}
+
+    def load_chats(self):
+        return set()
+
+    def save(self, chats: dict, languages: dict):
+        pass
+
+
+class SqliteStateBackend:
+    """Chats ativos e idiomas em SQLite (WAL), uma linha compacta por chave inteira."""
+
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS active_chats (chat_id INTEGER PRIMARY KEY)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS user_language (user_id INTEGER PRIMARY KEY, lang TEXT NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            chats = {row[0] for row in self._db.execute("SELECT chat_id FROM active_chats")}
+            languages = dict(self._db.execute("SELECT user_id, lang FROM user_language"))
+        return chats, languages
+
+    def load_chats(self):
+        with self._lock:
+            return {row[0] for row in self._db.execute("SELECT chat_id FROM active_chats")}
+
+    def save(self, chats: dict, languages: dict):
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO active_chats (chat_id) VALUES (?)",
+                [(c,) for c, active in chats.items() if active],
+            )
+            self._db.executemany(
+                "DELETE FROM active_chats WHERE chat_id = ?",
+                [(c,) for c, active in chats.items() if not active],
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO user_language (user_id, lang) VALUES (?, ?)",
+                [(u, lang) for u, lang in languages.items() if lang is not None],
+            )
+            self._db.executemany(
+                "DELETE FROM user_language WHERE user_id = ?",
+                [(u,) for u, lang in languages.items() if lang is None],
+            )
 
-def save_sent_news(news_id: str):
-    with open(SENT_NEWS_FILE, "a") as f:
-        f.write(news_id + "\n")
 
-# Carrega notícias já enviadas do arquivo
-sent_news: set = load_sent_news()
+state_backend = SqliteStateBackend(STATE_DB) if STATE_BACKEND == "sqlite" else MemoryStateBackend()
+_chats, _languages = state_backend.load()
+active_chats = WriteBehindSet(_chats)
+user_language = WriteBehindDict(_languages)
 
-active_chats: set = set()
-user_language: dict = {}
 
+def flush_state():
+    """Grava no backend tudo que mudou desde o último flush."""
+    chats, languages = active_chats.dirty, user_language.dirty
+    if not chats and not languages:
+        return
+    active_chats.dirty, user_language.dirty = {}, {}
+    try:
+        state_backend.save(chats, languages)
+    except Exception:
+        # Devolve as alterações que não foram sobrescritas enquanto isso
+        active_chats.dirty = {**chats, **active_chats.dirty}
+        user_language.dirty = {**languages, **user_language.dirty}
+        raise
 
-# ─── Helpers ─────────────────────────────────────────────────────────────────
 
-def translate_text(text: str, target: str) -> str:
+async def flush_state_job(ctx: ContextTypes.DEFAULT_TYPE):
     try:
-        return GoogleTranslator(source="en", target=target).translate(text)
+        await asyncio.get_running_loop().run_in_executor(None, flush_state)
     except Exception as e:
-        logger.error(f"Erro na tradução para {target}: {e}")
-        return text
+        logger.error(f"Erro ao gravar o estado: {e}")
+
+
+# ─── Cluster ──────────────────────────────────────────────────────────────────
+# Em CLUSTER_MODE cada instância disputa um lease na tabela leases do STATE_DB.
+# Quem segura o lease é o líder e roda os jobs periódicos; se ele cair, o lease
+# expira em até LEADER_LEASE segundos e outra instância assume.
+
+class LeaderLease:
+    """Lease de liderança em SQLite: (name, holder, expires_at), renovado pelo dono."""
+
+    def __init__(self, path: str, name: str, holder: str, ttl: float):
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        self.expires_at = 0.0
+        self.terms = 0  # quantas vezes esta instância virou líder
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=ttl / 3)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS job_runs (name TEXT PRIMARY KEY, last_run REAL NOT NULL)")
+        self._lock = threading.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        return time.time() < self.expires_at
+
+    def try_acquire(self) -> bool:
+        """Pega o lease se estiver livre ou vencido, ou renova se já é nosso."""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+                "WHERE leases.holder = excluded.holder OR leases.expires_at < ?",
+                (self.name, self.holder, now + self.ttl, now),
+            )
+        if cursor.rowcount > 0:
+            if not self.is_leader:
+                self.terms += 1
+            # Margem de um terço: para de agir como líder antes de outra instância poder assumir
+            self.expires_at = now + self.ttl * 2 / 3
+            return True
+        self.expires_at = 0.0
+        return False
+
+    def release(self):
+        self.expires_at = 0.0
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+
+    def claim_run(self, job: str, interval: float) -> bool:
+        """True se a última execução do job, em qualquer instância, foi há `interval`
+        segundos ou mais, e marca a de agora. Sem registro, começa a contar agora."""
+        now = time.time()
+        with self._lock:
+            if self._db.execute(
+                "INSERT OR IGNORE INTO job_runs (name, last_run) VALUES (?, ?)", (job, now)
+            ).rowcount:
+                return False
+            cursor = self._db.execute(
+                "UPDATE job_runs SET last_run = ? WHERE name = ? AND last_run <= ?", (now, job, now - interval)
+            )
+        return cursor.rowcount > 0
+
+    def holder_now(self) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT holder FROM leases WHERE name = ? AND expires_at >= ?", (self.name, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+
+leader_lease = LeaderLease(STATE_DB, "jobs", INSTANCE_ID, LEADER_LEASE) if CLUSTER_MODE else None
+
+
+def is_leader() -> bool:
+    return leader_lease is None or leader_lease.is_leader
+
+
+async def sync_from_store():
+    """Relê todo o estado compartilhado que outras instâncias podem ter gravado
+    (ao assumir a liderança; os jobs usam os sync_* abaixo, só com o que precisam)."""
+    loop = asyncio.get_running_loop()
+    chats, languages = await loop.run_in_executor(None, state_backend.load)
+    window = await loop.run_in_executor(None, sent_news.read_window)
+    # As trocas acontecem no event loop, onde os handlers mexem nesses conjuntos
+    active_chats.replace(chats)
+    user_language.replace(languages)
+    sent_news.replace(window)
+
+
+async def sync_chats():
+    """Relê só os chats ativos: o broadcast também vai para os que outras instâncias viram."""
+    chats = await asyncio.get_running_loop().run_in_executor(None, state_backend.load_chats)
+    active_chats.replace(chats)
+
+
+async def sync_sent_news():
+    """Acrescenta só as notícias gravadas no NEWS_DB desde a última leitura."""
+    sent_news.merge(await asyncio.get_running_loop().run_in_executor(None, sent_news.read_new))
+
+
+async def leader_election_job(ctx: ContextTypes.DEFAULT_TYPE):
+    loop = asyncio.get_running_loop()
+    was_leader = leader_lease.is_leader
+    try:
+        leader = await loop.run_in_executor(None, leader_lease.try_acquire)
+    except sqlite3.Error as e:
+        logger.error(f"Erro ao renovar o lease de líder: {e}")
+        return
+    if leader and not was_leader:
+        await sync_from_store()
+        logger.info(f"👑 {INSTANCE_ID} assumiu os jobs periódicos ({len(active_chats)} chats, {len(sent_news)} notícias)")
+    elif was_leader and not leader:
+        logger.warning(f"{INSTANCE_ID} perdeu o lease de líder para {leader_lease.holder_now()}")
+
+
+def leader_only(func, interval: float = None, sync=None):
+    """Job que só roda na instância líder.
+
+    O estado inteiro é relido ao assumir a liderança (leader_election_job); antes
+    de cada execução roda só `sync`, que relê o que o job usa. Com `interval`, o
+    horário da última execução fica no STATE_DB e o job é pulado até o intervalo
+    passar, para um líder novo não contar a partir do próprio boot.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(ctx):
+        if leader_lease is None:
+            return await func(ctx)
+        if not leader_lease.is_leader:
+            return None
+        if interval is not None:
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(None, leader_lease.claim_run, func.__name__, interval):
+                return None
+        if sync is not None:
+            await sync()
+        return await func(ctx)
+
+    return wrapper
+
+
+# ─── Métricas ─────────────────────────────────────────────────────────────────
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float):
+        """Limite superior do bucket onde cai o quantil q (aproximado, como no Prometheus)."""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """Contadores, gauges e histogramas em memória, exportados no formato texto do Prometheus.
+
+    Todas as chamadas hoje vêm do event loop (o TranslationRouter mede a latência
+    do tradutor no loop, não nas threads); o lock fica para quem registrar de threads.
+    """
+
+    def __init__(self, prefix: str = "apex"):
+        self.prefix = prefix
+        self.counters: dict = {}    # (nome, labels) -> valor
+        self.gauges: dict = {}
+        self.histograms: dict = {}
+        self.collectors: list = []  # funções chamadas antes de cada exportação
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, /, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, /, **labels):
+        with self._lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def add(self, name: str, value: float, /, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def observe(self, name: str, value: float, /, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, /, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter_total(self, name: str, /, **labels) -> float:
+        wanted = {(k, str(v)) for k, v in labels.items()}
+        with self._lock:
+            return sum(v for (n, lbl), v in self.counters.items() if n == name and wanted <= set(lbl))
+
+    def histogram(self, name: str, /, **labels):
+        return self.histograms.get(self._key(name, labels))
+
+    def render(self) -> str:
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception as e:
+                logger.warning(f"Erro ao coletar métricas: {e}")
+
+        def fmt(name, labels, extra=()):
+            pairs = list(labels) + list(extra)
+            inner = ",".join(f'{k}="{v}"' for k, v in pairs)
+            return f"{self.prefix}_{name}{{{inner}}}" if inner else f"{self.prefix}_{name}"
+
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                typed = set()
+                for (name, labels), value in sorted(series.items()):
+                    if name not in typed:
+                        lines.append(f"# TYPE {self.prefix}_{name} {kind}")
+                        typed.add(name)
+                    lines.append(f"{fmt(name, labels)} {value}")
+            typed = set()
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {self.prefix}_{name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{fmt(name + '_bucket', labels, [('le', le)])} {cumulative}")
+                lines.append(f"{fmt(name + '_sum', labels)} {histogram.sum}")
+                lines.append(f"{fmt(name + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# Tasks rodando algum handler ou job; o desligamento espera (ou cancela) essas
+in_flight_tasks: set = set()
+
+
+def instrumented(kind: str, func):
+    """Envolve um handler ou job com histograma de latência, contador de erros e gauge em voo."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        task = asyncio.current_task()
+        in_flight_tasks.add(task)
+        metrics.add("in_flight", 1, kind=kind, handler=name)
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            metrics.inc("errors_total", kind=kind, handler=name)
+            raise
+        finally:
+            metrics.observe("handler_seconds", time.perf_counter() - started, kind=kind, handler=name)
+            metrics.add("in_flight", -1, kind=kind, handler=name)
+            in_flight_tasks.discard(task)
+
+    return wrapper
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest que conta chamadas à Bot API, latência por método e respostas 429."""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs):
+        endpoint = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+        except Exception:
+            metrics.inc("telegram_errors_total", method=endpoint)
+            raise
+        metrics.observe("telegram_seconds", time.perf_counter() - started, method=endpoint)
+        metrics.inc("telegram_requests_total", method=endpoint, code=code)
+        if code == 429:
+            metrics.inc("telegram_rate_limited_total", method=endpoint)
+        return code, payload
+
+
+class MetricsServer:
+    """Servidor HTTP mínimo (asyncio) que só responde GET /metrics."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Métricas em http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode(errors="replace").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", metrics.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+metrics_server = MetricsServer(METRICS_LISTEN, METRICS_PORT)
+
+
+# ─── Tradução ────────────────────────────────────────────────────────────────
+# Os provedores fazem requisições HTTP bloqueantes, então cada um roda no seu próprio
+# pool de threads: um provedor travado não prende a fila dos outros.
+# O prazo de cada chamada, o circuit breaker e o hedge ficam no TranslationRouter;
+# o cache (LRU + SQLite) usa uma thread própria para não esperar atrás de tradutor lento.
+
+_cache_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="translation-cache")
+
+# Os textos do lote vão numa única requisição separados por BATCH_SEPARATOR.
+# Se o tradutor mexer no separador e a contagem não bater, cai para um por um.
+BATCH_SEPARATOR = "\n###\n"
+_BATCH_SPLIT_RE = re.compile(r"\s*#{3}\s*")
+
+
+class TranslationProvider:
+    """Backend de tradução. translate() é bloqueante e levanta exceção quando falha."""
+
+    name = "base"
+    max_chars = TRANSLATE_BATCH_MAX_CHARS
+    workers = TRANSLATE_WORKERS
+    busy = 0  # threads ocupadas ou na fila do executor
+    _executor = None
+    _busy_lock = threading.Lock()
+
+    @property
+    def saturated(self) -> bool:
+        return self.busy >= self.workers
+
+    def submit(self, fn, *args):
+        """Roda fn no executor do provedor (no máximo `workers` threads)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=f"translate-{self.name}"
+            )
+        with self._busy_lock:
+            self.busy += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._busy_lock:
+            self.busy -= 1
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        raise NotImplementedError
+
+    def translate_batch(self, texts: list, source: str, target: str) -> list:
+        """Traduz vários textos com o mínimo de requisições."""
+        joined = BATCH_SEPARATOR.join(texts)
+        # Texto com "###" confundiria a separação e a tradução iria para o chat errado
+        if len(texts) > 1 and len(joined) <= self.max_chars and not any("###" in t for t in texts):
+            translated = self.translate(joined, source, target)
+            parts = _BATCH_SPLIT_RE.split(translated.strip()) if translated else []
+            if len(parts) == len(texts):
+                return parts
+            translation_batcher.fallbacks += 1
+            metrics.inc("translation_batch_fallbacks_total", provider=self.name)
+        return [self.translate(text, source, target) for text in texts]
+
+
+class _RequestsWithTimeout:
+    """Fica no lugar do `requests` dos módulos do deep_translator.
+
+    O deep_translator chama requests.get sem timeout, então uma conexão travada
+    prenderia a thread para sempre; aqui toda requisição ganha um prazo de socket.
+    """
+
+    def __init__(self, requests_module, timeout: float):
+        self._requests = requests_module
+        self.timeout = timeout
+
+    def __getattr__(self, name):
+        return getattr(self._requests, name)
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self._requests.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self._requests.post(url, **kwargs)
+
+
+def _install_http_timeout(factory, timeout: float):
+    module = sys.modules.get(getattr(factory, "__module__", ""))
+    requests_module = getattr(module, "requests", None)
+    if isinstance(requests_module, types.ModuleType):
+        module.requests = _RequestsWithTimeout(requests_module, timeout)
+
+
+class DeepTranslatorProvider(TranslationProvider):
+    """Qualquer tradutor do deep_translator.
+
+    Os clientes guardam estado mutável por chamada, então cada thread do pool
+    mantém os seus. `codes` converte nossos códigos de idioma para os do backend.
+    `factory` pode ser o nome da classe no deep_translator, importado só no
+    primeiro uso (é o import mais pesado do bot).
+    """
+
+    def __init__(self, name: str, factory, max_chars: int = TRANSLATE_BATCH_MAX_CHARS,
+                 codes: dict = None, **options):
+        self.name = name
+        self.factory = factory
+        self.max_chars = max_chars
+        self.codes = codes or {}
+        self.options = options
+        self._local = threading.local()
+
+    def client(self, source: str, target: str):
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
+        key = (source, target)
+        if key not in clients:
+            factory = self.factory
+            if isinstance(factory, str):
+                import deep_translator
+                factory = self.factory = getattr(deep_translator, factory)
+                _install_http_timeout(factory, TRANSLATE_TIMEOUT)
+            clients[key] = factory(
+                source=self.codes.get(source, source), target=self.codes.get(target, target), **self.options
+            )
+        return clients[key]
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        return self.client(source, target).translate(text)
+
+
+class StubProvider(TranslationProvider):
+    """Provedor local, sem rede: só marca o texto com o idioma. Para desenvolvimento e testes."""
+
+    name = "stub"
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        return f"[{target}] {text}"
 
+    def translate_batch(self, texts: list, source: str, target: str) -> list:
+        return [self.translate(text, source, target) for text in texts]
+
+
+def make_provider(name: str) -> TranslationProvider:
+    if name == "google":
+        return DeepTranslatorProvider("google", "GoogleTranslator")
+    if name == "mymemory":
+        # MyMemory aceita no máximo 500 caracteres e usa códigos regionais
+        return DeepTranslatorProvider(
+            "mymemory", "MyMemoryTranslator", max_chars=500,
+            codes={"en": "en-GB", "pt": "pt-BR", "es": "es-ES"},
+        )
+    if name == "stub":
+        return StubProvider()
+    raise ValueError(f"Provedor de tradução desconhecido: {name}")
+
+
+class CircuitBreaker:
+    """Para de chamar um provedor depois de `max_failures` erros seguidos.
+
+    Com o circuito aberto, uma única chamada de teste passa a cada `reset` segundos;
+    se ela der certo o circuito fecha, se falhar continua aberto.
+    """
+
+    def __init__(self, max_failures: int, reset: float):
+        self.max_failures = max_failures
+        self.reset = reset
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self._probing or (self.opened_at is None and self.failures >= self.max_failures):
+            if not self._probing:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+    def abandon(self):
+        """A chamada foi cancelada sem resultado (perdeu o hedge): libera o teste."""
+        self._probing = False
+
+
+class TranslationRouter:
+    """Escolhe o provedor de cada chamada.
+
+    Cada chamada tem prazo de `timeout` segundos. Provedores com o circuito aberto
+    são pulados e, se um falhar, o próximo da lista é tentado. Com hedge_after > 0,
+    se o primeiro não responder nesse tempo o próximo é chamado em paralelo e vale
+    a resposta que chegar primeiro.
+
+    O prazo libera o handler; a thread fica presa até o timeout de socket da
+    requisição. Provedor com todas as threads ocupadas fica para o fim (sem contar
+    falha) e o circuit breaker evita continuar mandando chamadas para um provedor travado.
+    """
+
+    def __init__(self, providers: list, timeout: float, hedge_after: float,
+                 max_failures: int, reset: float):
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.max_failures = max_failures
+        self.reset = reset
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.set_providers(providers)
+
+    def set_providers(self, providers: list):
+        self.providers = list(providers)
+        self.breakers = {p.name: CircuitBreaker(self.max_failures, self.reset) for p in self.providers}
+
+    def _available(self, providers):
+        saturated = []
+        for provider in providers:
+            if provider.saturated:
+                metrics.inc("translator_saturated_total", provider=provider.name)
+                saturated.append(provider)
+                continue
+            if self.breakers[provider.name].allow():
+                return provider
+            metrics.inc("translator_short_circuits_total", provider=provider.name)
+        # Nenhum livre: entra na fila do primeiro ocupado com o circuito fechado (o prazo vale igual)
+        for provider in saturated:
+            if self.breakers[provider.name].allow():
+                return provider
+        return None
+
+    async def translate(self, texts: list, target: str, source: str = "en"):
+        """Traduções na ordem de `texts`, ou None se nenhum provedor respondeu."""
+        remaining = iter(self.providers)
+        provider = self._available(remaining)
+        if provider is None:
+            return None
+        tasks = {self._start(provider, texts, target, source)}
+        hedge = None
+        hedged = not self.hedge_after
+        while tasks:
+            done, tasks = await asyncio.wait(
+                tasks, timeout=None if hedged else self.hedge_after, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                result = task.result()
+                if result is not None:
+                    for loser in tasks:
+                        loser.cancel()
+                    if task is hedge:
+                        self.hedge_wins += 1
+                        metrics.inc("translator_hedge_wins_total", provider=provider.name)
+                    return result
+            if not done:
+                # O primeiro está lento: dispara o próximo em paralelo, uma vez só
+                hedged = True
+                provider = self._available(remaining)
+                if provider is not None:
+                    self.hedges += 1
+                    metrics.inc("translator_hedges_total", provider=provider.name)
+                    hedge = self._start(provider, texts, target, source)
+                    tasks.add(hedge)
+            elif not tasks:
+                provider = self._available(remaining)
+                if provider is not None:
+                    self.failovers += 1
+                    metrics.inc("translator_failovers_total", provider=provider.name)
+                    tasks.add(self._start(provider, texts, target, source))
+        return None
+
+    def _start(self, provider: TranslationProvider, texts: list, target: str, source: str):
+        # Submete já, e não dentro da task, para `busy` valer para a próxima chamada
+        future = provider.submit(provider.translate_batch, texts, source, target)
+        return asyncio.create_task(self._call(provider, future, target))
+
+    async def _call(self, provider: TranslationProvider, future, target: str):
+        breaker = self.breakers[provider.name]
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.CancelledError:
+            breaker.abandon()
+            raise
+        except asyncio.TimeoutError:
+            reason = "timeout"
+        except Exception as e:
+            reason = "error"
+            logger.warning(f"Erro no tradutor {provider.name} para {target}: {e}")
+        else:
+            breaker.success()
+            metrics.observe("translator_seconds", time.perf_counter() - started, provider=provider.name)
+            return result
+        trips = breaker.trips
+        breaker.failure()
+        metrics.inc("translator_errors_total", provider=provider.name, reason=reason)
+        if breaker.trips > trips:
+            metrics.inc("translator_circuit_trips_total", provider=provider.name)
+        if breaker.state != "closed":
+            logger.warning(f"Circuito do tradutor {provider.name} aberto ({breaker.failures} falhas seguidas)")
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "circuit_trips": sum(b.trips for b in self.breakers.values()),
+        }
+
+
+translation_router = TranslationRouter(
+    [make_provider(name) for name in TRANSLATE_PROVIDERS],
+    TRANSLATE_TIMEOUT, TRANSLATE_HEDGE_AFTER, CIRCUIT_FAILURES, CIRCUIT_RESET,
+)
+
+
+class TranslationCache:
+    """LRU com TTL em memória na frente de uma tabela SQLite persistente.
+
+    As chaves são normalizadas (espaços e maiúsculas), então "GM", "gm " e "Gm"
+    compartilham a mesma entrada. `_lock` protege só o LRU (o event loop consulta
+    a memória direto); o SQLite tem o seu, para o loop não esperar atrás do disco.
+    """
+
+    def __init__(self, path: str, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._mem: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def prune(self):
+        """Apaga do disco as traduções vencidas (roda no aquecimento, fora do caminho do start)."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl,))
+
+    @staticmethod
+    def make_key(text: str, target: str, source: str) -> str:
+        return f"{source}:{target}:{' '.join(text.split()).lower()}"
+
+    def get(self, key: str, disk: bool = True):
+        """Retorna a tradução em cache ou None. Com disk=False só olha a memória."""
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    metrics.inc("translation_cache_lookups_total", result="hit")
+                    return value
+                del self._mem[key]
+            if not disk:
+                return None
+            if self._db is None:
+                self.misses += 1
+                metrics.inc("translation_cache_lookups_total", result="miss")
+                return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, created_at FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+        with self._lock:
+            if row and row[1] + self.ttl > now:
+                self.disk_hits += 1
+                metrics.inc("translation_cache_lookups_total", result="disk_hit")
+                self._remember(key, row[0], row[1] + self.ttl)
+                return row[0]
+            self.misses += 1
+            metrics.inc("translation_cache_lookups_total", result="miss")
+            return None
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now + self.ttl)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, now),
+                )
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._mem[key] = (value, expires_at)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_size:
+            self._mem.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "size": len(self._mem),
+        }
+
+
+translation_cache = TranslationCache(TRANSLATION_CACHE_DB, TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL)
+
+
+def _cached_translations(texts: list, target: str, source: str) -> list:
+    return [translation_cache.get(TranslationCache.make_key(text, target, source)) for text in texts]
+
+
+def _store_translations(entries: dict):
+    for key, value in entries.items():
+        translation_cache.put(key, value)
+
+
+async def translate_texts(texts: list, target: str, source: str = "en") -> list:
+    """Traduz uma lista de textos: cache primeiro, depois os provedores.
+
+    Textos que nenhum provedor conseguiu traduzir voltam como None.
+    """
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(_cache_pool, _cached_translations, texts, target, source)
+    missing: dict = {}  # chave de cache -> índices no lote
+    for i, text in enumerate(texts):
+        if results[i] is None:
+            missing.setdefault(TranslationCache.make_key(text, target, source), []).append(i)
+    if not missing:
+        return results
+
+    pending = [texts[indexes[0]] for indexes in missing.values()]
+    translated = await translation_router.translate(pending, target, source)
+    if translated is None:
+        return results
+
+    fresh = {}
+    for key, text, value in zip(missing, pending, translated):
+        if value:
+            fresh[key] = value
+        for i in missing[key]:
+            results[i] = value or text  # resposta vazia do provedor: fica o original
+    if fresh:
+        await loop.run_in_executor(_cache_pool, _store_translations, fresh)
+    return results
+
+
+class TranslationBatcher:
+    """Agrupa pedidos de tradução por (origem, destino).
+
+    Sem lote em andamento para o par, o pedido sai já na próxima volta do loop
+    (junto com o que chegar nela). Com lote em andamento, os pedidos esperam
+    ele voltar, no máximo pela janela, ou até o lote encher; cada handler
+    recebe de volta só a sua tradução.
+    """
+
+    def __init__(self, window_ms: int, max_size: int, max_chars: int):
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self.max_chars = max_chars
+        self.batches = 0
+        self.items = 0
+        self.full_batches = 0
+        self.fallbacks = 0
+        self._pending: dict = {}  # (source, target) -> [(texto, future)]
+        self._timers: dict = {}
+        self._running: dict = {}  # (source, target) -> lotes em andamento
+
+    def submit(self, text: str, target: str, source: str = "en") -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        key = (source, target)
+        pending = self._pending.get(key)
+        if pending and sum(len(t) + len(BATCH_SEPARATOR) for t, _ in pending) + len(text) > self.max_chars:
+            self._flush(key)
+            pending = None
+        if pending is None:
+            pending = self._pending[key] = []
+            if self._running.get(key):
+                self._timers[key] = loop.call_later(self.window, self._flush, key)
+            else:
+                self._timers[key] = loop.call_soon(self._flush, key)
+        future = loop.create_future()
+        pending.append((text, future))
+        if len(pending) >= self.max_size:
+            self.full_batches += 1
+            metrics.inc("translation_batch_full_total")
+            self._flush(key)
+        return future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(key, None)
+        if not pending:
+            return
+        self.batches += 1
+        self.items += len(pending)
+        metrics.inc("translation_batches_total")
+        metrics.inc("translation_batch_items_total", len(pending))
+        self._running[key] = self._running.get(key, 0) + 1
+        asyncio.get_running_loop().create_task(self._run(key, pending))
+
+    async def _run(self, key, pending):
+        source, target = key
+        texts = [text for text, _ in pending]
+        try:
+            results = await translate_texts(texts, target, source)
+        except Exception as e:
+            logger.error(f"Erro no lote de tradução para {target}: {e}")
+            results = [None] * len(texts)
+        finally:
+            self._running[key] -= 1
+            if not self._running[key]:
+                del self._running[key]
+                self._flush(key)  # o que juntou enquanto este lote rodava sai agora
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "full_batches": self.full_batches,
+            "fallbacks": self.fallbacks,
+            "avg_fill": self.items / self.batches / self.max_size if self.batches else 0.0,
+        }
+
+
+translation_batcher = TranslationBatcher(
+    TRANSLATE_BATCH_WINDOW_MS, TRANSLATE_BATCH_MAX_SIZE, TRANSLATE_BATCH_MAX_CHARS
+)
+
+
+async def translate_async(text: str, target: str, source: str = "en") -> Optional[str]:
+    """Traduz fora do event loop, passando pelo cache e pelo micro-batching.
+
+    Retorna None quando nenhum provedor respondeu a tempo.
+    """
+    # Acerto na memória não precisa passar pelo pool
+    cached = translation_cache.get(TranslationCache.make_key(text, target, source), disk=False)
+    if cached is not None:
+        return cached
+    if TRANSLATE_BATCH_WINDOW_MS > 0 and len(text) < TRANSLATE_BATCH_MAX_CHARS and "###" not in text:
+        return await translation_batcher.submit(text, target, source)
+    return (await translate_texts([text], target, source))[0]
+
+
+# Fim de frase (. ! ? …) ou quebra de linha; o separador original volta na remontagem
+_SENTENCE_BREAK_RE = re.compile(r"\n+|(?<=[.!?…])\s+")
+
+
+def split_sentences(text: str, max_chars: int = TRANSLATE_CHUNK_CHARS) -> list:
+    """Divide o texto em pedaços de frases inteiras com até max_chars caracteres.
+
+    Retorna [(pedaço, separador)], e "".join(p + s) devolve o texto original.
+    Uma frase maior que max_chars vira um pedaço sozinha.
+    """
+    if len(text) <= max_chars:
+        return [(text, "")]
+    chunks = []
+    current, separator, pos = "", "", 0
+    for match in itertools.chain(_SENTENCE_BREAK_RE.finditer(text), [None]):
+        sentence = text[pos:match.start() if match else len(text)]
+        if current and len(current) + len(separator) + len(sentence) > max_chars:
+            chunks.append((current, separator))
+            current = sentence
+        else:
+            current += separator + sentence
+        separator = match.group() if match else ""
+        pos = match.end() if match else len(text)
+    chunks.append((current, separator))
+    return chunks
+
+
+async def translate_long(text: str, target: str, source: str = "en") -> Optional[str]:
+    """Traduz textos longos em pedaços paralelos e remonta na ordem original."""
+    chunks = split_sentences(text)
+    if len(chunks) == 1:
+        return await translate_async(text, target, source)
+    results = await asyncio.gather(*(translate_async(chunk, target, source) for chunk, _ in chunks))
+    if None in results:
+        return None
+    return "".join(result + separator for result, (_, separator) in zip(results, chunks))
+
+
+async def translate_many(text: str, targets=TRANSLATE_TARGETS, source: str = "en") -> dict:
+    """Traduz o mesmo texto para vários idiomas em paralelo (None nos que falharem)."""
+    results = await asyncio.gather(*(translate_long(text, t, source) for t in targets))
+    return dict(zip(targets, results))
+
+
+# ─── Detecção de idioma ──────────────────────────────────────────────────────
+# Classificador offline e barato: remove o que não se traduz (links, menções,
+# tickers, números, emojis) e pontua o resto por palavras e acentos típicos.
+
+_URL_RE     = re.compile(r"(?:https?://|www\.|t\.me/)\S+", re.IGNORECASE)
+_MENTION_RE = re.compile(r"[@#/]\w+")
+# Só formatos de instrumento: com dígito (TP1, US30, NAS100), par com barra (EUR/USD),
+# moeda ou par de moedas conhecidas (USD, XAUUSD) e as siglas de ordem SL/TP.
+# Palavras em maiúsculas ("BUY NOW", "OK THANKS") continuam sendo traduzidas.
+_CURRENCIES = "USD|EUR|GBP|JPY|CHF|AUD|NZD|CAD|XAU|XAG|BTC|ETH"
+_TICKER_RE  = re.compile(
+    rf"\b(?:[A-Z]{{1,6}}\d+[A-Z]*|[A-Z]{{3,6}}/[A-Z]{{3,6}}|(?:{_CURRENCIES}){{1,2}}|SL|TP)\b"
+)
+_WORD_RE    = re.compile(r"[^\W\d_]{2,}")
+
+_LANG_WORDS = {
+    "en": frozenset(
+        "the and you your is are was were this that with for have has not but what "
+        "will would can could just it's i'm don't do does to of in on at be my we they "
+        "thanks thank hello hi good morning night please yes buy sell now today "
+        "gm gn welcome great nice guys everyone how when where why".split()
+    ),
+    "pt": frozenset(
+        "não você vocês está estão é são com para pra uma um isso esse essa muito "
+        "obrigado obrigada valeu bom boa dia noite tarde olá oi sim agora hoje "
+        "quando onde porque por que também mais então ainda já gente galera "
+        "compra venda meu minha nós eles tudo de do da dos das no na nos nas em "
+        "os as se como ele ela eu vou foi vai vamos acho ouro dinheiro caiu subiu".split()
+    ),
+    "es": frozenset(
+        "no el los las usted ustedes está están es son con para una un eso ese esa "
+        "muy gracias hola buenos buenas días noches tardes sí ahora hoy cuando "
+        "donde porque también más entonces todavía ya gente compra venta mi "
+        "nosotros ellos todo pero yo tengo que qué de del en la lo al se por como "
+        "cómo su sus hay va voy vamos él ella fue creo oro dinero cayó subió".split()
+    ),
+}
+_LANG_CHARS = {"pt": frozenset("ãõâêôàç"), "es": frozenset("ñ¿¡")}
+_ACUTE_VOWELS = frozenset("áéíóú")  # comuns no espanhol; no português só contam as palavras da lista
+
+
+def translatable_words(text: str) -> list:
+    """Palavras que realmente precisam de tradução (sem links, menções, tickers etc.)."""
+    text = _URL_RE.sub(" ", text)
+    text = _MENTION_RE.sub(" ", text)
+    text = _TICKER_RE.sub(_strip_ticker, text)
+    return _WORD_RE.findall(text)
+
+
+def _strip_ticker(match) -> str:
+    token = match.group()
+    # Sigla que também é palavra comum de algum idioma fica no texto
+    return token if any(token.lower() in vocab for vocab in _LANG_WORDS.values()) else " "
+
+
+def detect_language(text: str):
+    """Retorna "en", "pt" ou "es", ou None quando não há nada para traduzir.
+
+    Palavra que só existe num idioma vale o dobro das compartilhadas (que, de, por).
+    Sem sinal claro assume inglês, que é o idioma padrão dos grupos; empate entre
+    pt e es também dá None, porque traduzir a partir do idioma errado é pior que
+    não responder.
+    """
+    words = [w.lower() for w in translatable_words(text)]
+    if not words:
+        return None
+    scores = dict.fromkeys(_LANG_WORDS, 0)
+    for word in words:
+        langs = [lang for lang, vocab in _LANG_WORDS.items() if word in vocab]
+        for lang in langs:
+            scores[lang] += 2 if len(langs) == 1 else 1
+        if word not in _LANG_WORDS["pt"] and any(c in _ACUTE_VOWELS for c in word):
+            scores["es"] += 1
+    for lang, chars in _LANG_CHARS.items():
+        scores[lang] += 2 * sum(c in chars for c in "".join(words))
+    best = max(scores.values())
+    leaders = [lang for lang in SUPPORTED_LANGS if scores[lang] == best]
+    if best == 0 or "en" in leaders:
+        return "en"
+    return leaders[0] if len(leaders) == 1 else None
+
+
+# ─── Helpers ─────────────────────────────────────────────────────────────────
 
 def get_lang(user_id: int) -> str:
     return user_language.get(user_id, "en")
@@ -195,79 +1709,812 @@ GHOST_MESSAGE = {
     "es": "¡Hola! Estoy interesado en la Cuenta PAMM de Apex Golden Community."
 }
 READ_MORE = {"en": "📰 Read more", "pt": "📰 Leia mais", "es": "📰 Leer más"}
+LEARN_MORE = {"en": "Learn more 🏎️", "pt": "Entenda mais 🏎️", "es": "Saber más 🏎️"}
+NO_THANKS_REPLY = {
+    "en": "👍 No problem! Feel free to reach out anytime.",
+    "pt": "👍 Sem problemas! Estamos à disposição.",
+    "es": "👍 ¡Sin problema! Estamos disponibles cuando quieras.",
+}
+
+# Chaves de um arquivo de idioma (LOCALES_DIR/<idioma>.json); as ausentes ficam em inglês.
+# Os textos podem usar {broker_ref_link} e {pamm_link}.
+LOCALIZED_STRINGS = {
+    "welcome": WELCOME,
+    "pamm_explanation": PAMM_EXPLANATION,
+    "no_thanks": NO_THANKS,
+    "learn_more": LEARN_MORE,
+    "talk_ghost": TALK_GHOST,
+    "ghost_message": GHOST_MESSAGE,
+    "no_thanks_reply": NO_THANKS_REPLY,
+}
+
+LANG_MENU = (
+    "👋 *Welcome / Bem-vindo / Bienvenido!*\n\n"
+    "🇬🇧 Welcome to *Apex Golden Community*! Please choose your language:\n"
+    "🇧🇷 Bem-vindo à *Apex Golden Community*! Por favor, escolha seu idioma:\n"
+    "🇪🇸 ¡Bienvenido a *Apex Golden Community*! Por favor, elige tu idioma:"
+)
+LANG_MENU_PAMM = (
+    "👋 *Welcome / Bem-vindo / Bienvenido!*\n\n"
+    "🇬🇧 Please choose your language to continue:\n"
+    "🇧🇷 Por favor, escolha seu idioma para continuar:\n"
+    "🇪🇸 Por favor, elige tu idioma para continuar:"
+)
+# {mentions} é trocado pelos links dos novos membros
+GROUP_WELCOME_MAIN = (
+    "👋 *Welcome / Bem-vindo / Bienvenido*, {mentions}!\n\n"
+    "🇬🇧 Welcome to *Apex Golden Community*! Click below to get started in private.\n"
+    "🇧🇷 Bem-vindo à *Apex Golden Community*! Clique abaixo para continuar no privado.\n"
+    "🇪🇸 ¡Bienvenido a *Apex Golden Community*! Haz clic abajo para continuar en privado."
+)
+GROUP_WELCOME_PAMM = (
+    "👋 {mentions}\n\n"
+    f"{WELCOME_PAMM_GROUP['en']}\n\n"
+    "─────────────────────\n\n"
+    f"{WELCOME_PAMM_GROUP['pt']}\n\n"
+    "─────────────────────\n\n"
+    f"{WELCOME_PAMM_GROUP['es']}"
+)
+BROADCAST_TEXT = (
+    "📈 *Apex Golden Community — Trading Opportunity*\n\n"
+    "🇬🇧 Join our broker and start copy trading with our PAMM account!\n"
+    "🇧🇷 Entre na corretora e comece o copy trading com nossa conta PAMM!\n"
+    "🇪🇸 ¡Únete al bróker y empieza el copy trading con nuestra cuenta PAMM!\n\n"
+    f"👉 {BROKER_REF_LINK}"
+)
 
 
 # ─── Teclados ─────────────────────────────────────────────────────────────────
 
-def lang_keyboard():
-    return InlineKeyboardMarkup([[
-        InlineKeyboardButton("🇬🇧 English", callback_data="lang_en"),
-        InlineKeyboardButton("🇧🇷 Português", callback_data="lang_pt"),
-        InlineKeyboardButton("🇪🇸 Español", callback_data="lang_es"),
-    ]])
+LANG_BUTTONS = {"en": "🇬🇧 English", "pt": "🇧🇷 Português", "es": "🇪🇸 Español"}
 
 
-def welcome_keyboard(user_id: int):
-    lang = get_lang(user_id)
-    learn = {"en": "Learn more 🏎️", "pt": "Entenda mais 🏎️", "es": "Saber más 🏎️"}
+def lang_keyboard(suffix: str = "", langs: tuple = SUPPORTED_LANGS):
+    buttons = [
+        InlineKeyboardButton(LANG_BUTTONS.get(lang, f"🌐 {lang.upper()}"), callback_data=f"lang_{lang}{suffix}")
+        for lang in langs
+    ]
+    return InlineKeyboardMarkup([buttons[i:i + 3] for i in range(0, len(buttons), 3)])
+
+
+def welcome_keyboard(strings: dict):
     return InlineKeyboardMarkup([[
-        InlineKeyboardButton(NO_THANKS[lang], callback_data="no_thanks"),
-        InlineKeyboardButton(learn[lang], callback_data="pamm_info"),
+        InlineKeyboardButton(strings["no_thanks"], callback_data="no_thanks"),
+        InlineKeyboardButton(strings["learn_more"], callback_data="pamm_info"),
     ]])
 
 
-def pamm_keyboard(user_id: int):
-    lang = get_lang(user_id)
-    from urllib.parse import quote
-    message = quote(GHOST_MESSAGE[lang])
+def pamm_keyboard(strings: dict):
+    message = quote(strings["ghost_message"])
     return InlineKeyboardMarkup([[
-        InlineKeyboardButton(NO_THANKS[lang], callback_data="no_thanks"),
-        InlineKeyboardButton(TALK_GHOST[lang], url=f"https://t.me/{OWNER_USERNAME}?text={message}"),
+        InlineKeyboardButton(strings["no_thanks"], callback_data="no_thanks"),
+        InlineKeyboardButton(strings["talk_ghost"], url=f"https://t.me/{OWNER_USERNAME}?text={message}"),
     ]])
 
 
+# ─── Mensagens pré-montadas ───────────────────────────────────────────────────
+
+class Payload(NamedTuple):
+    """Mensagem pronta para send_message/reply_text/edit_message_text."""
+    text: str
+    parse_mode: Optional[str] = None
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+
+    def kwargs(self, mentions: str = None) -> dict:
+        text = self.text if mentions is None else self.text.replace("{mentions}", mentions)
+        return {"text": text, "parse_mode": self.parse_mode, "reply_markup": self.reply_markup}
+
+
+class MessageRegistry:
+    """Textos e teclados de cada fluxo, montados uma vez só.
+
+    en/pt/es são montados na inicialização. Os outros idiomas do menu são os
+    arquivos LOCALES_DIR/<idioma>.json existentes, lidos na primeira vez em que
+    alguém escolhe o idioma. Os objetos do telegram são imutáveis, então os
+    handlers podem reaproveitá-los à vontade.
+    """
+
+    def __init__(self, locales_dir: str):
+        self.locales_dir = locales_dir
+        self._payloads: dict = {}  # (fluxo, idioma ou None) -> Payload
+        self._unavailable: set = set()
+        for lang in SUPPORTED_LANGS:
+            self._build_lang(lang, {key: table[lang] for key, table in LOCALIZED_STRINGS.items()})
+        self.languages = SUPPORTED_LANGS + self._locale_files()
+
+        self._payloads.update({
+            ("lang_menu", None): Payload(LANG_MENU, "Markdown", lang_keyboard(langs=self.languages)),
+            ("lang_menu_pamm", None): Payload(LANG_MENU_PAMM, "Markdown", lang_keyboard("_pamm", self.languages)),
+            ("group_active", None): Payload("✅ Apex Assistant is active in this group!"),
+            ("group_welcome_main", None): Payload(GROUP_WELCOME_MAIN, "Markdown", InlineKeyboardMarkup([[
+                InlineKeyboardButton(
+                    "👋 Start / Começar / Comenzar",
+                    url=f"https://t.me/{BOT_USERNAME}?start=welcome"
+                )
+            ]])),
+            ("group_welcome_pamm", None): Payload(GROUP_WELCOME_PAMM, "Markdown"),
+            ("broadcast", None): Payload(BROADCAST_TEXT, "Markdown", InlineKeyboardMarkup([[
+                InlineKeyboardButton(
+                    "📊 Learn more / Saiba mais / Saber más",
+                    url=f"https://t.me/{BOT_USERNAME}?start=pamm"
+                )
+            ]])),
+        })
+
+    def _locale_files(self) -> tuple:
+        """Idiomas extras com arquivo no locales_dir (só lista; o conteúdo fica para o primeiro uso)."""
+        try:
+            names = os.listdir(self.locales_dir)
+        except OSError:
+            return ()
+        return tuple(sorted(
+            lang for lang, ext in map(os.path.splitext, names)
+            if ext == ".json" and lang not in SUPPORTED_LANGS and re.fullmatch(r"[a-z]{2,3}", lang)
+        ))
+
+    def _build_lang(self, lang: str, strings: dict):
+        self._payloads[("welcome", lang)] = Payload(strings["welcome"], "Markdown", welcome_keyboard(strings))
+        self._payloads[("pamm", lang)] = Payload(strings["pamm_explanation"], "Markdown", pamm_keyboard(strings))
+        self._payloads[("no_thanks", lang)] = Payload(strings["no_thanks_reply"])
+
+    def _load_lang(self, lang: str) -> bool:
+        if lang in self._unavailable or not re.fullmatch(r"[a-z]{2,3}", lang):
+            return False
+        path = os.path.join(self.locales_dir, f"{lang}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            strings = {key: table["en"] for key, table in LOCALIZED_STRINGS.items()}
+            strings.update({
+                key: value.format(broker_ref_link=BROKER_REF_LINK, pamm_link=PAMM_LINK)
+                for key, value in loaded.items() if key in strings
+            })
+            self._build_lang(lang, strings)
+            logger.info(f"Idioma {lang} carregado de {path}")
+            return True
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Erro ao carregar o idioma {lang}: {e}")
+        self._unavailable.add(lang)
+        return False
+
+    def get(self, flow: str, lang: str = None) -> Payload:
+        """Mensagem pronta do fluxo; idiomas desconhecidos caem para inglês."""
+        payload = self._payloads.get((flow, lang))
+        if payload is None and lang is not None:
+            if self._load_lang(lang):
+                return self._payloads[(flow, lang)]
+            return self._payloads[(flow, "en")]
+        return payload
+
+
+messages = MessageRegistry(LOCALES_DIR)
+
+
+# ─── Envio com rate limit ─────────────────────────────────────────────────────
+
+class TokenBucket:
+    """Token bucket assíncrono; pause() segura tudo até o fim de um RetryAfter."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class SendResult(NamedTuple):
+    status: str  # "sent", "gone" (chat não existe mais / bot removido) ou "failed"
+    chat_id: int
+    message: Optional[object] = None
+
+
+# Erros de BadRequest que significam que o bot não tem mais onde postar
+_GONE_CHAT_ERRORS = ("chat not found", "group chat was deactivated", "bot was kicked", "chat_write_forbidden")
+
+
+class BroadcastDispatcher:
+    """Envia para muitos chats em paralelo respeitando os limites do Telegram.
+
+    RetryAfter e falhas de rede são repetidos com backoff; só erros permanentes
+    (bot removido, chat inexistente) marcam o chat para remoção. RetryAfter pausa
+    só o chat que levou flood control; a pausa global só acontece quando vários
+    chats levam ao mesmo tempo (aí o limite é o do bot inteiro). TimedOut não é
+    repetido: o Telegram pode ter aceitado a mensagem, e repetir duplicaria o post.
+    """
+
+    # RetryAfter em tantos chats diferentes dentro de 1s = limite global
+    GLOBAL_FLOOD_CHATS = 3
+
+    def __init__(self, global_rate: float, chat_rate: float, concurrency: int, max_retries: int):
+        self.chat_rate = chat_rate
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.sent = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.timed_out = 0
+        self.failed = 0
+        self._global = TokenBucket(global_rate, max(1.0, global_rate))
+        self._chats: dict = {}
+        self._floods: list = []  # (instante, chat_id) dos RetryAfter recentes
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, 1)
+        return bucket
+
+    def _flood_control(self, chat_id: int, seconds: float):
+        self._chat_bucket(chat_id).pause(seconds)
+        now = time.monotonic()
+        self._floods = [(t, c) for t, c in self._floods if now - t < 1.0] + [(now, chat_id)]
+        if len({c for _, c in self._floods}) >= self.GLOBAL_FLOOD_CHATS:
+            self._global.pause(seconds)
+
+    async def send(self, bot, chat_id: int, **kwargs):
+        """Envia uma mensagem. O status é "sent", "gone" ou "failed".
+
+        Se o grupo migrou para supergrupo, o chat_id retornado é o novo.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._chat_bucket(chat_id).acquire()
+            await self._global.acquire()
+            try:
+                message = await bot.send_message(chat_id=chat_id, **kwargs)
+                self.sent += 1
+                metrics.inc("broadcast_sent_total")
+                return SendResult("sent", chat_id, message)
+            except RetryAfter as e:
+                self.rate_limited += 1
+                metrics.inc("broadcast_rate_limited_total")
+                self._flood_control(chat_id, float(e.retry_after))
+                logger.warning(f"Flood control em {chat_id}, aguardando {e.retry_after}s")
+            except TimedOut as e:
+                # A mensagem pode ter chegado; sem message_id, mas contada como enviada
+                self.timed_out += 1
+                metrics.inc("broadcast_timed_out_total")
+                logger.warning(f"Timeout ao enviar para {chat_id}, sem repetir para não duplicar: {e}")
+                return SendResult("sent", chat_id)
+            except ChatMigrated as e:
+                logger.info(f"Chat {chat_id} migrou para {e.new_chat_id}")
+                chat_id = e.new_chat_id
+            except Forbidden as e:
+                logger.warning(f"Bot sem acesso a {chat_id}: {e}")
+                return SendResult("gone", chat_id)
+            except BadRequest as e:
+                if any(err in str(e).lower() for err in _GONE_CHAT_ERRORS):
+                    logger.warning(f"Chat {chat_id} não existe mais: {e}")
+                    return SendResult("gone", chat_id)
+                logger.warning(f"Erro ao enviar para {chat_id}: {e}")
+                break
+            except NetworkError as e:
+                logger.warning(f"Erro de rede ao enviar para {chat_id} (tentativa {attempt + 1}): {e}")
+                await asyncio.sleep(min(30, 2 ** attempt))
+            self.retries += 1
+            metrics.inc("broadcast_retries_total")
+        self.failed += 1
+        metrics.inc("broadcast_failed_total")
+        return SendResult("failed", chat_id)
+
+    async def broadcast(self, bot, chat_ids, **kwargs) -> dict:
+        """Envia a mesma mensagem para vários chats. Retorna {chat_id_original: SendResult}."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send_one(chat_id):
+            async with semaphore:
+                return await self.send(bot, chat_id, **kwargs)
+
+        chat_ids = list(chat_ids)
+        results = await asyncio.gather(*(send_one(c) for c in chat_ids))
+        return dict(zip(chat_ids, results))
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "timed_out": self.timed_out,
+            "failed": self.failed,
+        }
+
+
+broadcast_dispatcher = BroadcastDispatcher(
+    BROADCAST_GLOBAL_RATE, BROADCAST_CHAT_RATE, BROADCAST_CONCURRENCY, BROADCAST_MAX_RETRIES
+)
+
+
 # ─── Notícias RSS ─────────────────────────────────────────────────────────────
 
-async def check_news_job(ctx: ContextTypes.DEFAULT_TYPE):
-    """Verifica RSS da Investing.com e envia novas notícias do XAUUSD no grupo PAMM."""
-    try:
-        feed = feedparser.parse(XAUUSD_RSS)
-        for entry in feed.entries[:5]:  # verifica as 5 mais recentes
-            news_id = entry.get("id") or entry.get("link")
-            if news_id in sent_news:
-                continue
+class FeedFetcher:
+    """Baixa feeds RSS de forma assíncrona com GET condicional.
+
+    Manda If-None-Match/If-Modified-Since, para no 304 (ou se o corpo não mudou)
+    e só faz o parse, fora do event loop, quando há conteúdo novo. Os validadores
+    só são gravados via commit(), depois que as notícias foram processadas.
+    """
+
+    def __init__(self, state_file: str, timeout: float):
+        self.state_file = state_file
+        self.timeout = timeout
+        self.fetched = 0
+        self.not_modified = 0
+        self.errors = 0
+        self._state = self._load_state()
+        self._pending: dict = {}
+        self._client = None
+
+    def _load_state(self) -> dict:
+        if self.state_file and os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r") as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Estado dos feeds ignorado ({e})")
+        return {}
+
+    def _save_state(self):
+        if not self.state_file:
+            return
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._state, f)
+        os.replace(tmp, self.state_file)
+
+    async def fetch(self, url: str):
+        """Retorna as entradas do feed, ou None se nada mudou desde o último commit."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": "Mozilla/5.0 (compatible; ApexAssistant/1.0)"},
+            )
+        state = self._state.get(url, {})
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        started = time.perf_counter()
+        try:
+            response = await self._client.get(url, headers=headers)
+            metrics.observe("rss_seconds", time.perf_counter() - started, status=response.status_code)
+            metrics.inc("rss_requests_total", status=response.status_code)
+            if response.status_code == 304:
+                self.not_modified += 1
+                return None
+            response.raise_for_status()
+        except httpx.HTTPError:
+            self.errors += 1
+            metrics.inc("rss_errors_total")
+            raise
+
+        digest = hashlib.sha1(response.content).hexdigest()
+        if digest == state.get("digest"):
+            self.not_modified += 1
+            return None
+        self._pending[url] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "digest": digest,
+        }
+        self.fetched += 1
+        feed = await asyncio.get_running_loop().run_in_executor(None, parse_feed, response.content)
+        return feed.entries
+
+    def commit(self, url: str):
+        """Grava os validadores da última resposta de url."""
+        if url in self._pending:
+            self._state[url] = self._pending.pop(url)
+            self._save_state()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+feed_fetcher = FeedFetcher(FEED_STATE_FILE, NEWS_FETCH_TIMEOUT)
+
 
+def parse_feed(content: bytes):
+    import feedparser  # só carrega no primeiro feed com conteúdo novo (ou no aquecimento)
+    return feedparser.parse(content)
+
+
+# Palavras que não ajudam a distinguir manchetes
+_FINGERPRINT_STOPWORDS = frozenset(
+    "a an the and or of to in on at for by with from as is are be its it this that "
+    "after amid over vs says say".split()
+)
+
+# Tempos (ms) de cada etapa da última verificação de notícias
+news_timings: dict = {}
+
+
+def title_fingerprint(title: str) -> str:
+    """Impressão digital da manchete: mesmas palavras relevantes, em qualquer ordem ou caixa."""
+    words = {w for w in re.findall(r"\w+", title.lower()) if w not in _FINGERPRINT_STOPWORDS}
+    return "fp:" + hashlib.sha1(" ".join(sorted(words)).encode()).hexdigest()[:16]
+
+
+def news_chats() -> set:
+    return {chat_id for feed in NEWS_FEEDS for chat_id in feed["chats"]}
+
+
+async def _fetch_news_stories():
+    """Busca todos os feeds em paralelo e junta as manchetes novas por impressão digital.
+
+    Retorna (manchetes, quantos feeds falharam).
+    """
+    results = await asyncio.gather(
+        *(feed_fetcher.fetch(feed["url"]) for feed in NEWS_FEEDS), return_exceptions=True
+    )
+    stories: dict = {}  # impressão digital -> manchete
+    failures = 0
+    for feed, entries in zip(NEWS_FEEDS, results):
+        if isinstance(entries, Exception):
+            logger.error(f"Erro ao buscar o feed {feed['name']}: {entries}")
+            failures += 1
+            continue
+        if entries is None:
+            continue  # feed não mudou desde a última verificação
+        for entry in entries[:feed["limit"]]:
+            news_id  = entry.get("id") or entry.get("link")
             title_en = entry.get("title", "")
             link     = entry.get("link", "")
-
             if not title_en or not link:
                 continue
+            fingerprint = title_fingerprint(title_en)
+            if news_id in sent_news or sent_news.sent_within(fingerprint, NEWS_FINGERPRINT_HOURS * 3600):
+                continue
+            story = stories.setdefault(fingerprint, {
+                "title": title_en, "link": link, "label": feed["label"], "ids": set(), "chats": [],
+            })
+            story["ids"].add(news_id)
+            story["chats"] += [c for c in feed["chats"] if c not in story["chats"]]
+    return stories, failures
+
 
-            title_pt = translate_text(title_en, "pt")
-            title_es = translate_text(title_en, "es")
+async def check_news_job(ctx: ContextTypes.DEFAULT_TYPE) -> str:
+    """Verifica os feeds RSS e envia as notícias novas para os chats de cada feed.
 
-            text = (
-                "📰 *XAUUSD — Market News*\n\n"
-                f"🇬🇧 {title_en}\n\n"
-                f"🇧🇷 {title_pt}\n\n"
-                f"🇪🇸 {title_es}"
+    Retorna "new" (saiu notícia), "quiet" (nada novo) ou "error" para o NewsScheduler.
+    """
+    try:
+        await wait_warm_up()
+        started = time.perf_counter()
+        stories, failures = await _fetch_news_stories()
+        fetched = time.perf_counter()
+        if failures == len(NEWS_FEEDS):
+            return "error"
+
+        # Cada manchete única é traduzida uma vez só, todas em paralelo
+        translations = await asyncio.gather(*(translate_many(s["title"]) for s in stories.values()))
+        translated = time.perf_counter()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for fingerprint, story, titles in zip(stories, stories.values(), translations):
+            # Idioma sem tradução (provedores fora do ar) fica de fora em vez de repetir o inglês
+            text = "\n\n".join(
+                [f"📰 *{story['label']}*", f"🇬🇧 {story['title']}"]
+                + [f"{LANG_FLAGS[lang]} {titles[lang]}" for lang in TRANSLATE_TARGETS if titles.get(lang)]
             )
             keyboard = InlineKeyboardMarkup([[
-                InlineKeyboardButton("📰 Read / Leia / Leer", url=link)
+                InlineKeyboardButton("📰 Read / Leia / Leer", url=story["link"])
             ]])
-
-            await ctx.bot.send_message(
-                chat_id=PAMM_GROUP_ID,
-                text=text,
-                parse_mode="Markdown",
-                reply_markup=keyboard,
+            for chat_id in story["chats"]:
+                queue.put_nowait((fingerprint, chat_id, text, keyboard))
+
+        delivered: dict = {}  # impressão digital -> algum envio deu certo
+
+        async def sender():
+            while True:
+                fingerprint, chat_id, text, keyboard = await queue.get()
+                try:
+                    result = await broadcast_dispatcher.send(
+                        ctx.bot, chat_id, text=text, parse_mode="Markdown", reply_markup=keyboard,
+                    )
+                    delivered[fingerprint] = delivered.get(fingerprint, False) or result.status == "sent"
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(sender()) for _ in range(min(NEWS_SEND_WORKERS, queue.qsize()))]
+        await queue.join()
+        for worker in workers:
+            worker.cancel()
+        sent = time.perf_counter()
+
+        for fingerprint, ok in delivered.items():
+            if not ok:
+                continue
+            story = stories[fingerprint]
+            for news_id in story["ids"] | {fingerprint}:
+                sent_news.add(news_id)
+            logger.info(f"Notícia enviada: {story['title']}")
+        sent_news.flush()
+
+        # Sem falhas, os feeds não precisam ser baixados de novo até mudarem
+        if all(delivered.values()):
+            for feed in NEWS_FEEDS:
+                feed_fetcher.commit(feed["url"])
+
+        news_timings.update({
+            "fetch_ms": (fetched - started) * 1000,
+            "translate_ms": (translated - fetched) * 1000,
+            "send_ms": (sent - translated) * 1000,
+            "stories": len(stories),
+        })
+        if stories:
+            logger.info(
+                f"Notícias: {len(stories)} novas | fetch {news_timings['fetch_ms']:.0f}ms, "
+                f"tradução {news_timings['translate_ms']:.0f}ms, envio {news_timings['send_ms']:.0f}ms"
             )
-            sent_news.add(news_id)
-            save_sent_news(news_id)
-            logger.info(f"Notícia enviada: {title_en}")
+        return "new" if any(delivered.values()) else "quiet"
 
     except Exception as e:
+        metrics.inc("errors_total", kind="job", handler="check_news_job")
         logger.error(f"Erro ao buscar notícias: {e}")
+        return "error"
+
+
+class NewsScheduler:
+    """Agenda a próxima verificação de notícias pelo job_queue (run_once que se reagenda).
+
+    O intervalo base vem do horário do mercado: curto em volta das divulgações de
+    alto impacto e nas sessões de Londres/Nova York, longo na Ásia e com o mercado
+    fechado. Em cima dele: feed parado alonga aos poucos (até 4x), erros seguidos
+    dobram a espera até NEWS_INTERVAL_MAX, e ±10% de jitter evita bater no feed
+    sempre no mesmo segundo. Se no meio da espera o mercado entrar num modo mais
+    rápido (abertura, divulgação), acorda nessa hora.
+    """
+
+    INTERVALS = {
+        "release": NEWS_INTERVAL_RELEASE,
+        "active": NEWS_INTERVAL_ACTIVE,
+        "idle": NEWS_INTERVAL_IDLE,
+        "closed": NEWS_INTERVAL_CLOSED,
+    }
+
+    def __init__(self, release_times: list, jitter: float = 0.1):
+        self.releases = [int(h) * 60 + int(m) for h, m in (t.split(":") for t in release_times)]
+        self.jitter = jitter
+        self.quiet_streak = 0
+        self.error_streak = 0
+        self.next_run = None
+        self._callback = None
+
+    def mode(self, now: datetime) -> str:
+        local = now.astimezone(MARKET_TIMEZONE)
+        weekday, minute = local.weekday(), local.hour * 60 + local.minute
+        # Ouro spot/futuro: fecha sexta 17h e reabre domingo 18h (horário de Nova York)
+        if (weekday == 4 and minute >= 17 * 60) or weekday == 5 or (weekday == 6 and minute < 18 * 60):
+            return "closed"
+        before, after = NEWS_RELEASE_WINDOW
+        if weekday < 5 and any(r - before <= minute < r + after for r in self.releases):
+            return "release"
+        if weekday < 5 and 3 * 60 <= minute < 17 * 60:
+            return "active"
+        return "idle"
+
+    def next_delay(self, status: Optional[str], now: datetime = None) -> float:
+        """Segundos até a próxima verificação, dado o resultado da última (None = não rodou)."""
+        now = now or datetime.now(timezone.utc)
+        mode = self.mode(now)
+        if status == "error":
+            self.error_streak += 1
+        elif status is not None:
+            self.error_streak = 0
+            self.quiet_streak = self.quiet_streak + 1 if status == "quiet" else 0
+
+        delay = self.INTERVALS[mode]
+        if mode != "release":
+            delay *= min(1.25 ** self.quiet_streak, 4)
+        if self.error_streak:
+            delay = min(delay * 2 ** self.error_streak, NEWS_INTERVAL_MAX)
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+
+        for step in range(60, int(delay), 60):
+            if self.INTERVALS[self.mode(now + timedelta(seconds=step))] < self.INTERVALS[mode]:
+                delay = step
+                break
+        metrics.set("news_poll_delay_seconds", delay)
+        return delay
+
+    def start(self, job_queue, callback, first: float):
+        self._callback = callback
+        self.next_run = time.time() + first
+        job_queue.run_once(self._run, first, name="check_news")
+
+    async def _run(self, ctx: ContextTypes.DEFAULT_TYPE):
+        status = None
+        try:
+            status = await self._callback(ctx)
+        finally:
+            # Reagenda sempre, até se o job estourar; senão as notícias param para sempre
+            delay = self.next_delay(status)
+            self.next_run = time.time() + delay
+            ctx.job_queue.run_once(self._run, delay, name="check_news")
+
+
+news_scheduler = NewsScheduler(NEWS_RELEASE_TIMES)
+
+
+# ─── Boas-vindas agrupadas ────────────────────────────────────────────────────
+
+def welcome_flow(chat_id: int) -> str:
+    # Grupo PAMM: boas-vindas simples no grupo, sem venda.
+    # Grupo principal: botão para continuar no privado com o bot.
+    return "group_welcome_pamm" if is_pamm_group(chat_id) else "group_welcome_main"
+
+
+class JoinCoalescer:
+    """Junta as entradas de cada grupo durante JOIN_WINDOW e manda uma boas-vindas só.
+
+    Em raids as menções são divididas em mensagens de até JOIN_MAX_MENTIONS
+    nomes e MESSAGE_MAX_LENGTH caracteres; opcionalmente apaga a boas-vindas
+    anterior do grupo para não poluir o chat.
+    """
+
+    def __init__(self, window: float, max_mentions: int, delete_previous: bool):
+        self.window = window
+        self.max_mentions = max_mentions
+        self.delete_previous = delete_previous
+        self.joins = 0
+        self.messages = 0
+        self._pending: dict = {}  # chat_id -> [menções]
+        self._timers: dict = {}
+        self._flushing: set = set()
+        self._previous: dict = {}  # chat_id -> [message_ids da última boas-vindas]
+        self._bot = None
+
+    def add(self, bot, chat_id: int, mention: str):
+        self._bot = bot
+        self.joins += 1
+        metrics.inc("joins_total")
+        pending = self._pending.setdefault(chat_id, [])
+        pending.append(mention)
+        if len(pending) >= self.max_mentions:
+            self._start_flush(chat_id)
+        elif chat_id not in self._timers:
+            self._timers[chat_id] = asyncio.get_running_loop().call_later(
+                self.window, self._start_flush, chat_id
+            )
+
+    def _start_flush(self, chat_id: int):
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        mentions = self._pending.pop(chat_id, None)
+        if mentions:
+            task = asyncio.get_running_loop().create_task(self._send(chat_id, mentions))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    def _chunks(self, template: str, mentions: list):
+        room = MESSAGE_MAX_LENGTH - len(template) + len("{mentions}")
+        chunk: list = []
+        for mention in mentions:
+            if chunk and (len(chunk) >= self.max_mentions or len(", ".join(chunk + [mention])) > room):
+                yield ", ".join(chunk)
+                chunk = []
+            chunk.append(mention)
+        if chunk:
+            yield ", ".join(chunk)
+
+    async def _send(self, chat_id: int, mentions: list):
+        payload = messages.get(welcome_flow(chat_id))
+        sent_ids = []
+        for chunk in self._chunks(payload.text, mentions):
+            result = await broadcast_dispatcher.send(self._bot, chat_id, **payload.kwargs(mentions=chunk))
+            if result.message is not None:
+                sent_ids.append(result.message.message_id)
+                self.messages += 1
+                metrics.inc("join_welcomes_total")
+        if not sent_ids:
+            return
+        previous = self._previous.get(chat_id, [])
+        self._previous[chat_id] = sent_ids
+        if self.delete_previous:
+            for message_id in previous:
+                try:
+                    await self._bot.delete_message(chat_id=chat_id, message_id=message_id)
+                except Exception as e:
+                    logger.debug(f"Não foi possível apagar a boas-vindas {message_id} em {chat_id}: {e}")
+
+    def idle(self) -> bool:
+        return not self._pending and not self._flushing
+
+    async def flush(self):
+        """Envia tudo que está pendente agora (usado no desligamento)."""
+        for chat_id in list(self._pending):
+            self._start_flush(chat_id)
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+
+
+join_coalescer = JoinCoalescer(JOIN_WINDOW, JOIN_MAX_MENTIONS, DELETE_PREVIOUS_WELCOME)
+
+
+# ─── Respostas progressivas ──────────────────────────────────────────────────
+# A tradução que fica pronta primeiro já sai; as outras entram editando a mesma
+# mensagem, sempre na ordem de SUPPORTED_LANGS. O que passar de MESSAGE_MAX_LENGTH
+# continua em mensagens novas.
+
+def format_translation(lang: str, text: str) -> str:
+    return f"{LANG_FLAGS[lang]} *{lang.upper()}:* {text}"
+
+
+def paginate(blocks: list, limit: int = MESSAGE_MAX_LENGTH, separator: str = "\n\n") -> list:
+    """Junta os blocos em páginas de até limit caracteres.
+
+    Bloco grande demais é cortado na última quebra de linha, fim de frase ou espaço que couber.
+    """
+    pieces = []
+    for block in blocks:
+        while len(block) > limit:
+            for mark in ("\n", ". ", " "):
+                cut = block.rfind(mark, 0, limit)
+                if cut > 0:
+                    cut += len(mark.rstrip())
+                    break
+            else:
+                cut = limit
+            pieces.append(block[:cut])
+            block = block[cut:].lstrip()
+        pieces.append(block)
+    pages: list = []
+    for piece in pieces:
+        if pages and len(pages[-1]) + len(separator) + len(piece) <= limit:
+            pages[-1] += separator + piece
+        else:
+            pages.append(piece)
+    return pages
+
+
+class ProgressiveReply:
+    """Resposta a uma mensagem que vai crescendo: cada render() edita as páginas
+    que mudaram e manda as que ainda não existem."""
+
+    def __init__(self, msg):
+        self.msg = msg
+        self.sent: list = []  # [(Message, texto enviado)]
+
+    async def render(self, blocks: list):
+        for i, page in enumerate(paginate(blocks)):
+            if i >= len(self.sent):
+                self.sent.append((await self.msg.reply_text(page, parse_mode="Markdown"), page))
+                continue
+            message, current = self.sent[i]
+            if page == current:
+                continue
+            try:
+                await message.edit_text(page, parse_mode="Markdown")
+                self.sent[i] = (message, page)
+                metrics.inc("progressive_edits_total")
+            except BadRequest as e:
+                logger.warning(f"Não foi possível editar a tradução em {self.msg.chat_id}: {e}")
 
 
 # ─── Handlers ────────────────────────────────────────────────────────────────
@@ -278,44 +2525,83 @@ async def start_command(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
     if update.effective_chat.type != "private":
         active_chats.add(update.effective_chat.id)
-        await update.message.reply_text("✅ Apex Assistant is active in this group!")
+        await update.message.reply_text(**messages.get("group_active").kwargs())
         return
 
     if args == "pamm":
         if user_id in user_language:
-            await update.message.reply_text(
-                text=PAMM_EXPLANATION[get_lang(user_id)],
-                parse_mode="Markdown",
-                reply_markup=pamm_keyboard(user_id),
-            )
+            await update.message.reply_text(**messages.get("pamm", get_lang(user_id)).kwargs())
         else:
-            await update.message.reply_text(
-                "👋 *Welcome / Bem-vindo / Bienvenido!*\n\n"
-                "🇬🇧 Please choose your language to continue:\n"
-                "🇧🇷 Por favor, escolha seu idioma para continuar:\n"
-                "🇪🇸 Por favor, elige tu idioma para continuar:",
-                parse_mode="Markdown",
-                reply_markup=InlineKeyboardMarkup([[
-                    InlineKeyboardButton("🇬🇧 English", callback_data="lang_en_pamm"),
-                    InlineKeyboardButton("🇧🇷 Português", callback_data="lang_pt_pamm"),
-                    InlineKeyboardButton("🇪🇸 Español", callback_data="lang_es_pamm"),
-                ]]),
-            )
+            await update.message.reply_text(**messages.get("lang_menu_pamm").kwargs())
     else:
-        await update.message.reply_text(
-            "👋 *Welcome / Bem-vindo / Bienvenido!*\n\n"
-            "🇬🇧 Welcome to *Apex Golden Community*! Please choose your language:\n"
-            "🇧🇷 Bem-vindo à *Apex Golden Community*! Por favor, escolha seu idioma:\n"
-            "🇪🇸 ¡Bienvenido a *Apex Golden Community*! Por favor, elige tu idioma:",
-            parse_mode="Markdown",
-            reply_markup=lang_keyboard(),
+        await update.message.reply_text(**messages.get("lang_menu").kwargs())
+
+
+def is_admin(user) -> bool:
+    return user is not None and (user.id in ADMIN_IDS or user.username == OWNER_USERNAME)
+
+
+def _p95_ms(name: str, /, **labels) -> str:
+    histogram = metrics.histogram(name, **labels)
+    value = histogram.quantile(0.95) if histogram else None
+    return "—" if value is None else f"≤{value * 1000:.0f}ms"
+
+
+def admin_status() -> str:
+    """Resumo de onde está a lentidão: handlers, tradutor, RSS e Telegram."""
+    lines = ["", "⏱ Handler p95"]
+    for (name, labels), histogram in sorted(metrics.histograms.items()):
+        if name == "handler_seconds":
+            label = dict(labels)
+            errors = metrics.counter_total("errors_total", handler=label["handler"])
+            lines.append(f"• {label['handler']}: {_p95_ms(name, **label)} ({histogram.count} calls, {errors:.0f} errors)")
+    lines.append("")
+    for provider in translation_router.providers:
+        breaker = translation_router.breakers[provider.name]
+        lines.append(
+            f"🌐 Translator {provider.name}: p95 {_p95_ms('translator_seconds', provider=provider.name)}, "
+            f"{metrics.counter_total('translator_errors_total', provider=provider.name):.0f} errors, "
+            f"circuit {breaker.state}"
         )
+    router = translation_router.stats()
+    lines += [
+        f"🔀 Hedges: {router['hedges']} ({router['hedge_wins']} won), failovers: {router['failovers']}",
+        f"📰 RSS p95: {_p95_ms('rss_seconds', status=200)} (200) / {_p95_ms('rss_seconds', status=304)} (304), "
+        f"{metrics.counter_total('rss_errors_total'):.0f} errors",
+        f"✈️ Telegram: {metrics.counter_total('telegram_requests_total'):.0f} calls, "
+        f"{metrics.counter_total('telegram_rate_limited_total'):.0f} rate-limited, "
+        f"sendMessage p95 {_p95_ms('telegram_seconds', method='sendMessage')}",
+        f"📣 Broadcast: {broadcast_dispatcher.sent} sent, {broadcast_dispatcher.retries} retries, "
+        f"{broadcast_dispatcher.failed} failed",
+    ]
+    if leader_lease is not None:
+        role = "leader" if leader_lease.is_leader else f"follower (leader: {leader_lease.holder_now() or '—'})"
+        lines.append(f"👑 Instance {INSTANCE_ID}: {role}")
+    if news_scheduler.next_run:
+        lines.append(
+            f"⏰ News polling: {news_scheduler.mode(datetime.now(timezone.utc))} mode, "
+            f"next check in {max(news_scheduler.next_run - time.time(), 0):.0f}s"
+        )
+    if news_timings:
+        lines.append(
+            f"🗞 Last news run: fetch {news_timings['fetch_ms']:.0f}ms, "
+            f"translate {news_timings['translate_ms']:.0f}ms, send {news_timings['send_ms']:.0f}ms"
+        )
+    return "\n".join(lines)
 
 
 async def status_command(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
-        f"✅ Bot online.\n📡 Active groups: {len(active_chats)}\n📰 News sent: {len(sent_news)}"
+    cache = translation_cache.stats()
+    batches = translation_batcher.stats()
+    text = (
+        f"✅ Bot online.\n📡 Active groups: {len(active_chats)}\n📰 News sent: {len(sent_news)}\n"
+        f"🌐 Translation cache: {cache['hits'] + cache['disk_hits']} hits / {cache['misses']} misses "
+        f"({cache['hit_ratio']:.0%})\n"
+        f"📦 Translation batches: {batches['batches']} (avg fill {batches['avg_fill']:.0%})"
     )
+    if is_admin(update.effective_user):
+        text += "\n" + admin_status()
+    await update.message.reply_text(text)
 
 
 async def broadcast_command(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
@@ -327,20 +2613,26 @@ async def broadcast_command(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("⚠️ This command is not available in this group.")
         return
     active_chats.add(update.effective_chat.id)
+    if CLUSTER_MODE:
+        await sync_chats()  # os chats das outras instâncias também recebem
     await broadcast_job(ctx)
 
 
 async def news_command(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     """Força verificação de notícias manualmente (para testes)."""
-    if update.effective_chat.id != PAMM_GROUP_ID:
-        await update.message.reply_text("⚠️ This command is only available in the PAMM group.")
+    if update.effective_chat.id not in news_chats():
+        await update.message.reply_text("⚠️ This command is only available in the news groups.")
+        return
+    if not is_leader():
+        # Só o líder envia notícias; rodar aqui poderia repetir manchetes
+        await update.message.reply_text("ℹ️ News are checked by the leader instance, please try again shortly.")
         return
     await update.message.reply_text("🔍 Checking for news...")
     await check_news_job(ctx)
 
 
 async def translate_message(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    """Traduz mensagens em inglês do grupo para PT e ES."""
+    """Traduz mensagens do grupo para os idiomas suportados que faltam."""
     msg = update.message
     if not msg or not msg.text:
         return
@@ -352,13 +2644,43 @@ async def translate_message(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     if not text:
         return
 
-    pt = translate_text(text, "pt")
-    es = translate_text(text, "es")
+    source = detect_language(text)
+    if source is None:
+        return  # só emoji, link, ticker ou número
+
+    targets = tuple(lang for lang in SUPPORTED_LANGS if lang != source)
+    tasks = {asyncio.create_task(translate_long(text, lang, source)): lang for lang in targets}
+    translations: dict = {}
+    reply = ProgressiveReply(msg)
+    normalized = " ".join(text.split()).lower()
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(
+            pending, return_when=asyncio.FIRST_COMPLETED if STREAMING_REPLIES else asyncio.ALL_COMPLETED
+        )
+        # Idioma sem provedor disponível fica de fora, em vez de repetir o original
+        translations.update({tasks[task]: task.result() for task in done if task.result() is not None})
+
+        # Nomes, gírias e afins voltam iguais do tradutor; não vale a resposta
+        if all(" ".join(t.split()).lower() == normalized for t in translations.values()):
+            continue
+        # As traduções já rodaram em paralelo; só a resposta respeita a ordem do chat
+        await wait_chat_turn()
+        await reply.render([format_translation(lang, translations[lang]) for lang in targets if lang in translations])
+        pass_chat_turn()
 
-    await msg.reply_text(
-        f"🇧🇷 *PT:* {pt}\n\n🇪🇸 *ES:* {es}",
-        parse_mode="Markdown"
-    )
+
+_MARKDOWN_CHARS_RE = re.compile(r"[_*`\[\]]")
+
+
+def mention_markdown(user_id: int, name: str) -> str:
+    """Link de menção em Markdown (v1) que não quebra com _ * ` [ ] no nome.
+
+    Um nome inválido derrubaria o sendMessage inteiro da boas-vindas agrupada.
+    O v1 não aceita escape dentro do texto do link, então esses caracteres saem.
+    """
+    name = _MARKDOWN_CHARS_RE.sub("", name).strip() or "👋"
+    return f"[{name}](tg://user?id={user_id})"
 
 
 async def new_member(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
@@ -372,40 +2694,12 @@ async def new_member(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
     chat_id = result.chat.id
 
-    # ── Grupo PAMM: boas-vindas simples no grupo, sem venda ──
-    if is_pamm_group(chat_id):
-        await ctx.bot.send_message(
-            chat_id=chat_id,
-            text=(
-                f"👋 [{user.first_name}](tg://user?id={user.id})\n\n"
-                f"{WELCOME_PAMM_GROUP['en']}\n\n"
-                "─────────────────────\n\n"
-                f"{WELCOME_PAMM_GROUP['pt']}\n\n"
-                "─────────────────────\n\n"
-                f"{WELCOME_PAMM_GROUP['es']}"
-            ),
-            parse_mode="Markdown",
-        )
+    mention = mention_markdown(user.id, user.first_name)
 
-    # ── Grupo principal: botão para continuar no privado com o bot ──
+    if JOIN_WINDOW > 0:
+        join_coalescer.add(ctx.bot, chat_id, mention)
     else:
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton(
-                "👋 Start / Começar / Comenzar",
-                url=f"https://t.me/{BOT_USERNAME}?start=welcome"
-            )
-        ]])
-        await ctx.bot.send_message(
-            chat_id=chat_id,
-            text=(
-                f"👋 *Welcome / Bem-vindo / Bienvenido*, [{user.first_name}](tg://user?id={user.id})!\n\n"
-                "🇬🇧 Welcome to *Apex Golden Community*! Click below to get started in private.\n"
-                "🇧🇷 Bem-vindo à *Apex Golden Community*! Clique abaixo para continuar no privado.\n"
-                "🇪🇸 ¡Bienvenido a *Apex Golden Community*! Haz clic abajo para continuar en privado."
-            ),
-            parse_mode="Markdown",
-            reply_markup=keyboard,
-        )
+        await ctx.bot.send_message(chat_id=chat_id, **messages.get(welcome_flow(chat_id)).kwargs(mentions=mention))
 
 
 async def callback_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
@@ -417,93 +2711,405 @@ async def callback_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     if data.startswith("lang_") and not data.endswith("_pamm"):
         lang = data.split("_")[1]
         user_language[user_id] = lang
-        await query.edit_message_text(
-            text=WELCOME[lang],
-            parse_mode="Markdown",
-            reply_markup=welcome_keyboard(user_id),
-        )
+        await query.edit_message_text(**messages.get("welcome", lang).kwargs())
 
     elif data.endswith("_pamm"):
         lang = data.split("_")[1]
         user_language[user_id] = lang
-        await query.edit_message_text(
-            text=PAMM_EXPLANATION[lang],
-            parse_mode="Markdown",
-            reply_markup=pamm_keyboard(user_id),
-        )
+        await query.edit_message_text(**messages.get("pamm", lang).kwargs())
 
     elif data == "pamm_info":
-        lang = get_lang(user_id)
-        await query.edit_message_text(
-            text=PAMM_EXPLANATION[lang],
-            parse_mode="Markdown",
-            reply_markup=pamm_keyboard(user_id),
-        )
+        await query.edit_message_text(**messages.get("pamm", get_lang(user_id)).kwargs())
 
     elif data == "no_thanks":
-        lang = get_lang(user_id)
-        msgs = {
-            "en": "👍 No problem! Feel free to reach out anytime.",
-            "pt": "👍 Sem problemas! Estamos à disposição.",
-            "es": "👍 ¡Sin problema! Estamos disponibles cuando quieras.",
-        }
-        await query.edit_message_text(msgs[lang])
+        await query.edit_message_text(**messages.get("no_thanks", get_lang(user_id)).kwargs())
 
 
 async def broadcast_job(ctx: ContextTypes.DEFAULT_TYPE):
     """Broadcast a cada 4h apenas nos grupos principais (não no grupo PAMM)."""
-    text = (
-        "📈 *Apex Golden Community — Trading Opportunity*\n\n"
-        "🇬🇧 Join our broker and start copy trading with our PAMM account!\n"
-        "🇧🇷 Entre na corretora e comece o copy trading com nossa conta PAMM!\n"
-        "🇪🇸 ¡Únete al bróker y empieza el copy trading con nuestra cuenta PAMM!\n\n"
-        f"👉 {BROKER_REF_LINK}"
-    )
-    keyboard = InlineKeyboardMarkup([[
-        InlineKeyboardButton(
-            "📊 Learn more / Saiba mais / Saber más",
-            url=f"https://t.me/{BOT_USERNAME}?start=pamm"
-        )
-    ]])
+    # nunca envia broadcast no grupo PAMM
+    targets = [chat_id for chat_id in active_chats if not is_pamm_group(chat_id)]
+    results = await broadcast_dispatcher.broadcast(ctx.bot, targets, **messages.get("broadcast").kwargs())
+    for chat_id, result in results.items():
+        if result.status == "gone" or result.chat_id != chat_id:
+            active_chats.discard(chat_id)
+        if result.status != "gone" and result.chat_id != chat_id:
+            active_chats.add(result.chat_id)
+    sent = sum(result.status == "sent" for result in results.values())
+    logger.info(f"Broadcast enviado para {sent}/{len(targets)} grupos")
 
-    for chat_id in list(active_chats):
-        if is_pamm_group(chat_id):
-            continue  # nunca envia broadcast no grupo PAMM
+
+# ─── Processamento de updates ────────────────────────────────────────────────
+
+class PriorityLimiter:
+    """Semáforo em que, havendo fila, quem tem menor prioridade numérica entra primeiro."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.active = 0
+        self._waiters: list = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority: int):
+        if self.active < self.capacity and not self._waiters:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
         try:
-            await ctx.bot.send_message(
-                chat_id=chat_id,
-                text=text,
-                parse_mode="Markdown",
-                reply_markup=keyboard,
-            )
-        except Exception as e:
-            logger.warning(f"Erro ao enviar broadcast para {chat_id}: {e}")
-            active_chats.discard(chat_id)
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # a vaga chegou junto com o cancelamento
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)  # a vaga passa direto para o próximo
+                return
+        self.active -= 1
+
+
+def update_priority(update: object) -> int:
+    """0 = callbacks e entradas no grupo, 1 = comandos e privado, 2 = traduções do grupo."""
+    if not isinstance(update, Update):
+        return 1
+    if update.callback_query or update.chat_member or update.my_chat_member:
+        return 0
+    msg = update.message
+    if msg and (msg.chat.type == "private" or (msg.text or "").startswith("/")):
+        return 1
+    return 2
+
+
+class ChatTurn:
+    """Vez de responder no chat: o update anterior do mesmo chat precisa ter terminado."""
+
+    def __init__(self, previous: Optional[asyncio.Future], release_slot, finish):
+        self.previous = previous
+        self._release_slot = release_slot
+        self._finish = finish
+        self.passed = False
+
+    async def wait(self):
+        if self.previous is None or self.previous.done():
+            return
+        # Não segura vaga enquanto espera: o update anterior pode estar na fila por uma
+        self._release_slot()
+        await asyncio.shield(self.previous)
+
+    def pass_on(self):
+        """Libera o próximo update do chat (assim que o anterior também tiver liberado)."""
+        if self.passed:
+            return
+        self.passed = True
+        if self.previous is None or self.previous.done():
+            self._finish()
+        else:
+            self.previous.add_done_callback(self._finish)
+
+
+_chat_turn: contextvars.ContextVar = contextvars.ContextVar("chat_turn", default=None)
+
+
+async def wait_chat_turn():
+    """Espera a vez de responder no chat do update atual (no-op fora do ChatOrderedUpdateProcessor)."""
+    turn = _chat_turn.get()
+    if turn is not None:
+        await turn.wait()
+
+
+def pass_chat_turn():
+    """A primeira resposta já saiu: o próximo update do chat pode responder (edições não mudam a ordem)."""
+    turn = _chat_turn.get()
+    if turn is not None:
+        turn.pass_on()
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processa updates em paralelo, mas sempre em ordem dentro do mesmo chat.
+
+    Updates de um chat ocupado esperam a vez sem tomar vaga dos outros chats,
+    e as vagas livres vão primeiro para callbacks e boas-vindas. Mensagens do
+    grupo (prioridade 2) começam na hora: o trabalho pesado (tradução) roda em
+    paralelo e só a resposta espera a vez, via wait_chat_turn().
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_pending: int):
+        super().__init__(max(max_pending, max_concurrent_updates))
+        self._slots = PriorityLimiter(max_concurrent_updates)
+        self._tails: dict = {}  # chat_id -> future do último update enfileirado no chat
+        self.tasks: set = set()  # updates recebidos e ainda não terminados (rodando ou na fila)
+
+    @property
+    def in_flight(self) -> int:
+        return self._slots.active
+
+    async def do_process_update(self, update: object, coroutine):
+        chat = update.effective_chat if isinstance(update, Update) else None
+        chat_id = chat.id if chat else None
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        previous = self._tails.get(chat_id) if chat_id is not None else None
+        if chat_id is not None:
+            self._tails[chat_id] = done
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        priority = update_priority(update)
+        holding = False
+
+        def release_slot():
+            nonlocal holding
+            if holding:
+                holding = False
+                self._slots.release()
+
+        def finish(_=None):
+            if done.done():
+                return
+            done.set_result(None)
+            if chat_id is not None and self._tails.get(chat_id) is done:
+                del self._tails[chat_id]
+
+        turn = ChatTurn(previous, release_slot, finish)
+        try:
+            if previous is not None and priority < 2:
+                await asyncio.shield(previous)
+            await self._slots.acquire(priority)
+            holding = True
+            _chat_turn.set(turn)
+            await coroutine
+        finally:
+            release_slot()
+            self.tasks.discard(task)
+            # O chat só anda quando o anterior também liberou, mesmo que este tenha acabado antes
+            turn.pass_on()
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+
+def collect_metrics():
+    """Atualiza os gauges (níveis do momento) na hora da exportação.
+
+    O que só cresce (acertos do cache, envios, hedges, lotes) é contador `_total`,
+    incrementado onde o evento acontece; aqui ficam só tamanhos, médias e estados.
+    """
+    cache = translation_cache.stats()
+    metrics.set("translation_cache_size", cache["size"])
+    metrics.set("translation_cache_hit_ratio", cache["hit_ratio"])
+    metrics.set("translation_batch_avg_fill", translation_batcher.stats()["avg_fill"])
+    for name, breaker in translation_router.breakers.items():
+        metrics.set("translator_circuit_open", int(breaker.state != "closed"), provider=name)
+    metrics.set("active_chats", len(active_chats))
+    metrics.set("sent_news", len(sent_news))
+    metrics.set("leader", int(is_leader()), instance=INSTANCE_ID)
+
+
+metrics.collectors.append(collect_metrics)
+
+
+# ─── Start rápido e desligamento gracioso ────────────────────────────────────
+# O post_init só dispara o aquecimento e volta, então o polling/webhook começa
+# antes dele terminar; só o job de notícias espera (precisa do sent_news).
+# No SIGTERM, drain() para de receber updates e espera o que está em andamento.
+
+warm_up_task: Optional[asyncio.Task] = None
+drain_task: Optional[asyncio.Task] = None
+
+
+def _preload_modules():
+    import deep_translator  # noqa: F401
+    import feedparser  # noqa: F401
+
+
+async def warm_up():
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        loop.run_in_executor(None, sent_news.load),
+        loop.run_in_executor(_cache_pool, translation_cache.prune),
+        loop.run_in_executor(None, _preload_modules),
+        return_exceptions=True,
+    )
+    for error in results:
+        if isinstance(error, Exception):
+            logger.error(f"Erro no aquecimento: {error}")
+    logger.info(f"Aquecimento concluído em {(time.perf_counter() - started) * 1000:.0f}ms")
 
 
-def main():
-    app = Application.builder().token(BOT_TOKEN).build()
+async def wait_warm_up():
+    if warm_up_task is not None and not warm_up_task.done():
+        await asyncio.shield(warm_up_task)
+
 
-    app.add_handler(CommandHandler("start", start_command))
-    app.add_handler(CommandHandler("status", status_command))
-    app.add_handler(CommandHandler("broadcast", broadcast_command))
-    app.add_handler(CommandHandler("news", news_command))
-    app.add_handler(ChatMemberHandler(new_member, ChatMemberHandler.CHAT_MEMBER))
+async def drain(app: Application):
+    """Para de receber updates e espera handlers, jobs e envios na fila, até DRAIN_TIMEOUT."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    logger.info(f"Desligando: drenando o trabalho em andamento (até {DRAIN_TIMEOUT:.0f}s)")
+    if app.job_queue is not None:
+        app.job_queue.scheduler.pause()  # nenhum job novo começa
+    if app.updater is not None and app.updater.running:
+        await app.updater.stop()
+    processor = app.update_processor
+
+    def pending() -> set:
+        return set(getattr(processor, "tasks", ())) | in_flight_tasks
+
+    async def idle():
+        await join_coalescer.flush()
+        while pending():
+            await asyncio.wait(pending())
+        await join_coalescer.flush()  # entradas que chegaram nos últimos updates
+
+    try:
+        await asyncio.wait_for(idle(), DRAIN_TIMEOUT)
+        logger.info(f"Drenagem concluída em {loop.time() - started:.1f}s")
+    except asyncio.TimeoutError:
+        leftover = pending()
+        logger.warning(f"Prazo de drenagem estourado; cancelando {len(leftover)} tarefas")
+        for task in leftover:
+            task.cancel()
+        await asyncio.gather(*leftover, return_exceptions=True)
+    app.stop_running()
+
+
+def _on_sigterm(app: Application):
+    global drain_task
+    if not app.running:
+        # Ainda no post_init ou registrando o webhook: stop_running() só marcaria e o sinal
+        # se perderia. Nada foi processado, então sai direto pelo finally do PTB
+        # (shutdown e post_shutdown salvam o estado).
+        raise SystemExit(0)
+    if drain_task is None:
+        drain_task = asyncio.get_running_loop().create_task(drain(app))
+
+
+async def on_start(app: Application):
+    global warm_up_task
+    warm_up_task = asyncio.get_running_loop().create_task(warm_up())
+    try:
+        # Substitui o SIGTERM do PTB (para na hora) pela drenagem
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, _on_sigterm, app)
+    except (NotImplementedError, RuntimeError):
+        pass  # Windows ou fora da thread principal: fica o desligamento padrão
+    if METRICS_PORT:
+        await metrics_server.start()
+
+
+async def on_stop(app: Application):
+    # Ainda com o bot conectado: manda as boas-vindas que estavam na janela
+    await join_coalescer.flush()
+
+
+async def on_shutdown(app: Application):
+    if leader_lease is not None and leader_lease.is_leader:
+        leader_lease.release()  # outra instância assume sem esperar o lease vencer
+    await metrics_server.stop()
+    flush_state()
+    sent_news.flush()
+    sent_news.save_snapshot()
+    await feed_fetcher.close()
+
+
+def allowed_updates_for(app: Application) -> list:
+    """Tipos de update que algum handler registrado consome; o resto nem é pedido ao Telegram."""
+    types = set()
+    for group in app.handlers.values():
+        for handler in group:
+            if isinstance(handler, CallbackQueryHandler):
+                types.add(Update.CALLBACK_QUERY)
+            elif isinstance(handler, ChatMemberHandler):
+                if handler.chat_member_types in (ChatMemberHandler.CHAT_MEMBER, ChatMemberHandler.ANY_CHAT_MEMBER):
+                    types.add(Update.CHAT_MEMBER)
+                if handler.chat_member_types in (ChatMemberHandler.MY_CHAT_MEMBER, ChatMemberHandler.ANY_CHAT_MEMBER):
+                    types.add(Update.MY_CHAT_MEMBER)
+            elif isinstance(handler, (CommandHandler, MessageHandler)):
+                types.add(Update.MESSAGE)  # os handlers só leem update.message
+            else:
+                return list(Update.ALL_TYPES)
+    return sorted(types)
+
+
+def build_application(base_url: str = BOT_API_URL) -> Application:
+    builder = Application.builder().token(BOT_TOKEN).base_url(base_url)
+    builder.request(InstrumentedRequest(connection_pool_size=256))
+    builder.get_updates_request(InstrumentedRequest(connection_pool_size=1))
+    builder.post_init(on_start).post_stop(on_stop).post_shutdown(on_shutdown)
+    if UPDATE_CONCURRENCY > 1:
+        builder.concurrent_updates(ChatOrderedUpdateProcessor(UPDATE_CONCURRENCY, UPDATE_MAX_PENDING))
+    app = builder.build()
+
+    # Todos os handlers e jobs passam pela instrumentação (latência, erros, em voo)
+    handler = functools.partial(instrumented, "handler")
+    job = functools.partial(instrumented, "job")
+
+    app.add_handler(CommandHandler("start", handler(start_command)))
+    app.add_handler(CommandHandler("status", handler(status_command)))
+    app.add_handler(CommandHandler("broadcast", handler(broadcast_command)))
+    app.add_handler(CommandHandler("news", handler(news_command)))
+    app.add_handler(ChatMemberHandler(handler(new_member), ChatMemberHandler.CHAT_MEMBER))
     app.add_handler(MessageHandler(
         filters.TEXT & ~filters.COMMAND & filters.ChatType.GROUPS,
-        translate_message
+        handler(translate_message)
     ))
-    app.add_handler(CallbackQueryHandler(callback_handler))
+    app.add_handler(CallbackQueryHandler(handler(callback_handler)))
+
+    # Em cluster, broadcast e notícias só rodam na instância com o lease de líder
+    if leader_lease is not None:
+        app.job_queue.run_repeating(job(leader_election_job), interval=LEADER_LEASE / 3, first=0)
+
+    # Broadcast a cada 4h (apenas grupo principal). Em cluster o job confere a cada
+    # minuto o horário do último broadcast no STATE_DB, valendo para qualquer líder.
+    if leader_lease is not None:
+        check_every = min(BROADCAST_INTERVAL, 60)
+        app.job_queue.run_repeating(
+            job(leader_only(broadcast_job, BROADCAST_INTERVAL, sync=sync_chats)), interval=check_every, first=check_every
+        )
+    else:
+        app.job_queue.run_repeating(
+            job(leader_only(broadcast_job, sync=sync_chats)), interval=BROADCAST_INTERVAL, first=BROADCAST_INTERVAL
+        )
+
+    # Grava chats ativos e idiomas em lote
+    app.job_queue.run_repeating(job(flush_state_job), interval=STATE_FLUSH_INTERVAL, first=STATE_FLUSH_INTERVAL)
+
+    # Verifica notícias com intervalo adaptativo (mais rápido nas sessões e divulgações)
+    news_scheduler.start(app.job_queue, job(leader_only(check_news_job, sync=sync_sent_news)), first=30)
 
-    # Broadcast a cada 4h (apenas grupo principal)
-    app.job_queue.run_repeating(broadcast_job, interval=BROADCAST_INTERVAL, first=BROADCAST_INTERVAL)
+    return app
 
-    # Verifica notícias a cada 15 minutos
-    app.job_queue.run_repeating(check_news_job, interval=900, first=30)
 
-    logger.info("🤖 Apex Assistant iniciado!")
-    app.run_polling(allowed_updates=Update.ALL_TYPES)
+def main():
+    if CLUSTER_MODE and (RUN_MODE != "webhook" or STATE_BACKEND != "sqlite" or not NEWS_DB):
+        # Várias instâncias no getUpdates brigam (409 Conflict); o estado precisa estar no disco
+        raise SystemExit("CLUSTER_MODE exige RUN_MODE=webhook, STATE_BACKEND=sqlite e NEWS_DB")
+    app = build_application()
+    allowed_updates = allowed_updates_for(app)
+
+    if RUN_MODE == "webhook":
+        if not WEBHOOK_URL:
+            raise SystemExit("RUN_MODE=webhook exige WEBHOOK_URL")
+        logger.info(f"🤖 Apex Assistant iniciado (webhook na porta {WEBHOOK_PORT})!")
+        # SIGTERM fecha o servidor HTTP primeiro; app.stop() ainda termina os updates em andamento
+        app.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=allowed_updates,
+        )
+    else:
+        logger.info("🤖 Apex Assistant iniciado!")
+        app.run_polling(allowed_updates=allowed_updates)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
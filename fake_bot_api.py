@@ -0,0 +1,282 @@
+"""
+Bot API falsa para rodar o bot localmente em testes e benchmarks.
+
+Sobe um servidor HTTP que responde como https://api.telegram.org/bot<token>/<método>,
+grava todas as chamadas e entrega updates via getUpdates ou direto no webhook do bot:
+
+    api = FakeBotAPI(latency=0.05)
+    api.start()
+    app = bot.build_application(base_url=api.base_url)
+    await start_webhook(app, port=8081, webhook_url="http://127.0.0.1:8081")
+    await api.post_update(text_update(chat_id=-100, text="Gold is flying"))
+    assert api.count("sendMessage") == 1
+"""
+
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import httpx
+
+BOT_USER = {
+    "id": 1000,
+    "is_bot": True,
+    "first_name": "Apex Assistant",
+    "username": "apexghost_fx_bot",
+    "can_join_groups": True,
+    "can_read_all_group_messages": True,
+    "supports_inline_queries": False,
+}
+
+_ids = itertools.count(1)
+
+
+class FakeBotAPI:
+    """Servidor local que imita a Bot API. latency atrasa cada resposta (em segundos)."""
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.calls: list = []  # (método, parâmetros, instante)
+        self.webhook_url = None
+        self.webhook_secret = None
+        self._updates: list = []
+        self._failures: dict = {}  # método -> [(código, descrição, retry_after)]
+        self._message_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self) -> "FakeBotAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ─── Consulta e controle ─────────────────────────────────────────────────
+
+    def count(self, method: str = None) -> int:
+        with self._lock:
+            return sum(1 for m, _, _ in self.calls if method is None or m == method)
+
+    def calls_to(self, method: str) -> list:
+        with self._lock:
+            return [params for m, params, _ in self.calls if m == method]
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    def fail(self, method: str, error_code: int = 429, description: str = "Too Many Requests",
+             retry_after: int = None, times: int = 1):
+        """Faz as próximas `times` chamadas a `method` falharem com o erro dado."""
+        with self._lock:
+            self._failures.setdefault(method, []).extend([(error_code, description, retry_after)] * times)
+
+    def queue_update(self, update: dict):
+        """Deixa um update para o próximo getUpdates (modo polling)."""
+        with self._lock:
+            self._updates.append(update)
+
+    async def post_update(self, update: dict, secret: str = None) -> int:
+        """Entrega um update no webhook registrado pelo bot e retorna o status HTTP."""
+        if not self.webhook_url:
+            raise RuntimeError("O bot ainda não chamou setWebhook")
+        secret = self.webhook_secret if secret is None else secret
+        headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+        async with httpx.AsyncClient() as client:
+            response = await client.post(self.webhook_url, json=update, headers=headers)
+        return response.status_code
+
+    # ─── Respostas ───────────────────────────────────────────────────────────
+
+    def _message(self, params: dict) -> dict:
+        chat_id = params.get("chat_id", 0)
+        return {
+            "message_id": params.get("message_id") or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if int(chat_id) > 0 else "supergroup"},
+            "from": BOT_USER,
+            "text": params.get("text", ""),
+        }
+
+    def _result(self, method: str, params: dict):
+        if method == "getMe":
+            return BOT_USER
+        if method in ("sendMessage", "editMessageText"):
+            return self._message(params)
+        if method == "getUpdates":
+            with self._lock:
+                updates, self._updates = self._updates, []
+            if not updates:
+                time.sleep(min(float(params.get("timeout") or 0), 0.2))
+            return updates
+        if method == "setWebhook":
+            self.webhook_url = params.get("url")
+            self.webhook_secret = params.get("secret_token")
+            return True
+        if method == "deleteWebhook":
+            self.webhook_url = None
+            return True
+        if method == "getWebhookInfo":
+            return {"url": self.webhook_url or "", "has_custom_certificate": False, "pending_update_count": 0}
+        return True
+
+    def _handle(self, method: str, params: dict):
+        """Retorna (status HTTP, corpo JSON) da chamada."""
+        with self._lock:
+            self.calls.append((method, params, time.monotonic()))
+            failures = self._failures.get(method)
+            failure = failures.pop(0) if failures else None
+        if self.latency:
+            time.sleep(self.latency)
+        if failure:
+            error_code, description, retry_after = failure
+            body = {"ok": False, "error_code": error_code, "description": description}
+            if retry_after is not None:
+                body["parameters"] = {"retry_after": retry_after}
+            return error_code, body
+        return 200, {"ok": True, "result": self._result(method, params)}
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length).decode() if length else ""
+                params = _parse_params(raw, self.headers.get("Content-Type", ""))
+                method = self.path.rstrip("/").rsplit("/", 1)[-1]
+                status, payload = api._handle(method, params)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _parse_params(raw: str, content_type: str) -> dict:
+    if not raw:
+        return {}
+    if content_type.startswith("application/json"):
+        return json.loads(raw)
+    params = {}
+    for key, values in parse_qs(raw).items():
+        try:
+            params[key] = json.loads(values[0])
+        except ValueError:
+            params[key] = values[0]
+    return params
+
+
+async def start_webhook(app, port: int, webhook_url: str, url_path: str = "telegram",
+                        secret_token: str = None, allowed_updates: list = None):
+    """Sobe o app em modo webhook sem bloquear (o equivalente assíncrono de run_webhook)."""
+    await app.initialize()
+    if app.post_init:
+        await app.post_init(app)
+    await app.updater.start_webhook(
+        listen="127.0.0.1",
+        port=port,
+        url_path=url_path,
+        webhook_url=f"{webhook_url.rstrip('/')}/{url_path}",
+        secret_token=secret_token,
+        allowed_updates=allowed_updates,
+    )
+    await app.start()
+
+
+async def stop_app(app):
+    """Para o app na mesma ordem do run_webhook/run_polling."""
+    if app.updater.running:
+        await app.updater.stop()
+    if app.running:
+        await app.stop()
+        if app.post_stop:
+            await app.post_stop(app)
+    await app.shutdown()
+    if app.post_shutdown:
+        await app.post_shutdown(app)
+
+
+# ─── Updates sintéticos ──────────────────────────────────────────────────────
+
+def _user(user_id: int, first_name: str = "Trader") -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": first_name}
+
+
+def text_update(chat_id: int, text: str, user_id: int = 42, chat_type: str = "supergroup") -> dict:
+    update_id = next(_ids)
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": chat_type},
+            "from": _user(user_id),
+            "text": text,
+            **({"entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]}
+               if text.startswith("/") else {}),
+        },
+    }
+
+
+def callback_update(user_id: int, data: str, message_id: int = 1) -> dict:
+    update_id = next(_ids)
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": "fake",
+            "data": data,
+            "from": _user(user_id),
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": BOT_USER,
+                "text": "…",
+            },
+        },
+    }
+
+
+def join_update(chat_id: int, user_id: int, first_name: str = "Trader") -> dict:
+    now = int(time.time())
+    return {
+        "update_id": next(_ids),
+        "chat_member": {
+            "chat": {"id": chat_id, "type": "supergroup", "title": "Apex"},
+            "from": _user(user_id, first_name),
+            "date": now,
+            "old_chat_member": {"status": "left", "user": _user(user_id, first_name)},
+            "new_chat_member": {"status": "member", "user": _user(user_id, first_name)},
+        },
+    }
@@ -0,0 +1,38 @@
+"""O bot lê a configuração no import, então o ambiente dos testes é montado aqui,
+antes de qualquer `import bot`: nada de rede, banco ou arquivo no repositório."""
+
+import os
+import socket
+import sys
+
+import pytest
+
+os.environ.update({
+    "BOT_TOKEN": "123456:TEST",
+    "STATE_BACKEND": "memory",
+    "TRANSLATION_CACHE_DB": "",
+    "NEWS_DB": "",
+    "FEED_STATE_FILE": "",
+    "TRANSLATE_PROVIDERS": "stub",
+    "TRANSLATE_BATCH_WINDOW_MS": "0",
+    "STREAMING_REPLIES": "false",
+    "JOIN_WINDOW": "0",
+    "CLUSTER_MODE": "false",
+    "METRICS_PORT": "0",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_bot_api import FakeBotAPI  # noqa: E402
+
+
+@pytest.fixture
+def api():
+    with FakeBotAPI() as fake:
+        yield fake
+
+
+@pytest.fixture
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
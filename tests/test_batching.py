@@ -0,0 +1,77 @@
+import asyncio
+
+import bot
+
+
+class Recording(bot.TranslationProvider):
+    name = "recording"
+
+    def __init__(self):
+        self.requests = []
+
+    def translate(self, text, source, target):
+        self.requests.append(text)
+        return text.upper()
+
+
+def fake_translate_texts(calls, delay=0.05):
+    async def translate_texts(texts, target, source="en"):
+        calls.append(list(texts))
+        await asyncio.sleep(delay)
+        return [f"{target}:{t}" for t in texts]
+    return translate_texts
+
+
+def test_idle_submit_is_not_delayed_by_the_window(monkeypatch):
+    calls = []
+    monkeypatch.setattr(bot, "translate_texts", fake_translate_texts(calls, delay=0))
+    batcher = bot.TranslationBatcher(window_ms=2000, max_size=10, max_chars=1000)
+
+    async def scenario():
+        return await asyncio.wait_for(batcher.submit("gm", "pt"), 0.5)
+
+    assert asyncio.run(scenario()) == "pt:gm"
+    assert calls == [["gm"]]
+
+
+def test_burst_joins_the_batch_after_the_one_in_flight(monkeypatch):
+    calls = []
+    monkeypatch.setattr(bot, "translate_texts", fake_translate_texts(calls))
+    batcher = bot.TranslationBatcher(window_ms=2000, max_size=10, max_chars=1000)
+
+    async def scenario():
+        first = [batcher.submit(f"a{i}", "pt") for i in range(3)]
+        await asyncio.sleep(0.01)  # primeiro lote em andamento
+        second = [batcher.submit(f"b{i}", "pt") for i in range(4)]
+        other = batcher.submit("c", "es")  # outro par não espera o lote do pt
+        return await asyncio.gather(*first, *second, other)
+
+    results = asyncio.run(scenario())
+    assert results == [f"pt:a{i}" for i in range(3)] + [f"pt:b{i}" for i in range(4)] + ["es:c"]
+    # O segundo lote saiu quando o primeiro voltou, não depois da janela de 2s
+    assert calls == [["a0", "a1", "a2"], ["c"], ["b0", "b1", "b2", "b3"]]
+    assert batcher.stats()["batches"] == 3
+
+
+def test_full_batch_flushes_immediately(monkeypatch):
+    calls = []
+    monkeypatch.setattr(bot, "translate_texts", fake_translate_texts(calls))
+    batcher = bot.TranslationBatcher(window_ms=2000, max_size=2, max_chars=1000)
+
+    async def scenario():
+        futures = [batcher.submit(t, "pt") for t in ("x", "y", "z")]
+        return await asyncio.gather(*futures)
+
+    assert asyncio.run(scenario()) == ["pt:x", "pt:y", "pt:z"]
+    assert calls == [["x", "y"], ["z"]]
+    assert batcher.full_batches == 1
+
+
+def test_batch_goes_in_one_request_unless_a_text_has_the_separator():
+    provider = Recording()
+    assert provider.translate_batch(["gm", "gn"], "en", "pt") == ["GM", "GN"]
+    assert provider.requests == ["gm" + bot.BATCH_SEPARATOR + "gn"]
+
+    provider.requests.clear()
+    assert provider.translate_batch(["buy ### sell", "gn"], "en", "pt") == ["BUY ### SELL", "GN"]
+    assert provider.requests == ["buy ### sell", "gn"]
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+from telegram.error import BadRequest, ChatMigrated, Forbidden, RetryAfter, TimedOut
+
+import bot
+
+
+class ScriptedBot:
+    """send_message levanta os erros roteirizados para cada chat, na ordem, depois envia."""
+
+    def __init__(self, script):
+        self.script = {chat_id: list(errors) for chat_id, errors in script.items()}
+        self.calls = []
+
+    async def send_message(self, chat_id, **kwargs):
+        self.calls.append((chat_id, time.monotonic()))
+        errors = self.script.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+        return f"msg-{chat_id}"
+
+
+def dispatcher():
+    return bot.BroadcastDispatcher(global_rate=1000, chat_rate=1000, concurrency=10, max_retries=3)
+
+
+def test_retry_after_pauses_only_that_chat():
+    fake = ScriptedBot({1: [RetryAfter(0.3)]})
+    sender = dispatcher()
+
+    async def scenario():
+        started = time.monotonic()
+        results = await sender.broadcast(fake, [1, 2, 3], text="gm")
+        return started, results
+
+    started, results = asyncio.run(scenario())
+    assert {c: r.status for c, r in results.items()} == {1: "sent", 2: "sent", 3: "sent"}
+    assert results[1].message == "msg-1"
+    assert sender.rate_limited == 1 and sender.retries == 1
+    times = {}
+    for chat_id, at in fake.calls:
+        times.setdefault(chat_id, []).append(at - started)
+    assert max(times[2] + times[3]) < 0.2  # os outros chats não esperaram
+    assert times[1][1] >= 0.29
+
+
+def test_timed_out_is_not_retried():
+    fake = ScriptedBot({1: [TimedOut()]})
+    sender = dispatcher()
+    result = asyncio.run(sender.send(fake, 1, text="gm"))
+    assert result.status == "sent" and result.message is None
+    assert len(fake.calls) == 1
+    assert sender.timed_out == 1 and sender.retries == 0
+
+
+def test_permanent_errors_mark_the_chat_gone():
+    fake = ScriptedBot({
+        1: [Forbidden("Forbidden: bot was kicked from the group chat")],
+        2: [BadRequest("Chat not found")],
+        3: [BadRequest("Message text is empty")],
+    })
+    sender = dispatcher()
+    results = asyncio.run(sender.broadcast(fake, [1, 2, 3], text="gm"))
+    assert results[1].status == "gone"
+    assert results[2].status == "gone"
+    assert results[3].status == "failed"  # erro do pedido, não do chat: sem remover nem repetir
+    assert [c for c, _ in fake.calls].count(3) == 1
+
+
+def test_migrated_chat_is_sent_to_the_new_id():
+    fake = ScriptedBot({1: [ChatMigrated(-1001)]})
+    result = asyncio.run(dispatcher().send(fake, 1, text="gm"))
+    assert result == bot.SendResult("sent", -1001, "msg--1001")
+    assert [c for c, _ in fake.calls] == [1, -1001]
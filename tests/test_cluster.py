@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import bot
+
+
+def test_lease_takeover_after_expiry(tmp_path):
+    path = str(tmp_path / "state.db")
+    first = bot.LeaderLease(path, "jobs", "first", ttl=0.3)
+    second = bot.LeaderLease(path, "jobs", "second", ttl=0.3)
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert second.holder_now() == "first"
+
+    time.sleep(0.35)  # o dono parou de renovar
+    assert second.try_acquire()
+    assert not first.try_acquire()
+    assert not first.is_leader
+    assert first.holder_now() == "second"
+
+    second.release()
+    assert first.try_acquire()
+    assert first.terms == 2
+
+
+def test_job_interval_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "state.db")
+    first = bot.LeaderLease(path, "jobs", "first", ttl=30)
+    second = bot.LeaderLease(path, "jobs", "second", ttl=30)
+
+    assert not first.claim_run("broadcast_job", 0.2)  # primeira vez: só começa a contar
+    assert not second.claim_run("broadcast_job", 0.2)
+    time.sleep(0.25)
+    assert second.claim_run("broadcast_job", 0.2)
+    assert not first.claim_run("broadcast_job", 0.2)  # o outro líder acabou de rodar
+
+
+def test_sent_news_sync_reads_only_new_rows(tmp_path):
+    path = str(tmp_path / "news.db")
+    leader = bot.SentNewsStore(path, retention_days=30, max_entries=100)
+    follower = bot.SentNewsStore(path, retention_days=30, max_entries=100)
+    leader.add("old story")
+    leader.flush()
+    follower.load()
+    assert "old story" in follower
+
+    leader.add("new story")
+    leader.flush()
+    rows = follower.read_new()
+    assert bot.SentNewsStore._hash("new story") in rows
+    assert len(rows) <= 2  # a partir da última leitura, não a janela inteira
+    follower.merge(rows)
+    assert "new story" in follower and len(follower) == 2
+
+
+def test_leader_job_only_syncs_what_it_needs(monkeypatch):
+    calls = []
+
+    class Lease:
+        is_leader = True
+
+    async def sync():
+        calls.append("sync")
+
+    async def full_sync():
+        calls.append("full")
+
+    async def job(ctx):
+        calls.append("job")
+
+    monkeypatch.setattr(bot, "leader_lease", Lease())
+    monkeypatch.setattr(bot, "sync_from_store", full_sync)
+    asyncio.run(bot.leader_only(job, sync=sync)(None))
+    assert calls == ["sync", "job"]
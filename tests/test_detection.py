@@ -0,0 +1,41 @@
+import pytest
+
+import bot
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Creo que el oro va a subir", "es"),
+    ("Vamos a comprar oro", "es"),
+    ("Qué opinan del mercado?", "es"),
+    ("Entré en la operación", "es"),
+    ("¿Cuándo abre el mercado?", "es"),
+    ("Muchas gracias por la ayuda", "es"),
+    ("Bom dia galera!", "pt"),
+    ("Acho que o ouro vai subir", "pt"),
+    ("Já está no mercado", "pt"),
+    ("Eu vou esperar o sinal", "pt"),
+    ("What do you think about the Fed decision today?", "en"),
+    ("BUY NOW", "en"),
+    ("OK THANKS GUYS", "en"),
+    ("gm", "en"),
+])
+def test_detect_language(text, expected):
+    assert bot.detect_language(text) == expected
+
+
+@pytest.mark.parametrize("text", ["XAUUSD 2350.5", "TP1 2345 SL 2330", "🚀🚀🚀", "https://example.com/chart", "EUR/USD"])
+def test_nothing_to_translate(text):
+    assert bot.detect_language(text) is None
+
+
+def test_pt_es_tie_is_not_settled_by_list_order():
+    assert bot.detect_language("Por que?") is None
+
+
+def test_translatable_words_strips_links_mentions_and_tickers():
+    text = "@trader check https://t.me/apex XAUUSD US30 EUR/USD TP2 now #gold 2350"
+    assert bot.translatable_words(text) == ["check", "now"]
+
+
+def test_translatable_words_keeps_caps_words_and_accents():
+    assert bot.translatable_words("SELL GOLD NOW, operación") == ["SELL", "GOLD", "NOW", "operación"]
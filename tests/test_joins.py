@@ -0,0 +1,24 @@
+import re
+
+import bot
+
+# Markdown v1 do Telegram: o texto do link não pode ter entidades nem colchetes
+_LINK_RE = re.compile(r"^\[([^\[\]_*`]+)\]\(tg://user\?id=(\d+)\)$")
+
+
+def test_mention_survives_markdown_in_the_name():
+    for name in ("*Gold_King*", "[admin]", "`x`", "Ana"):
+        match = _LINK_RE.match(bot.mention_markdown(7, name))
+        assert match and match.group(2) == "7"
+    assert bot.mention_markdown(7, "Ana") == "[Ana](tg://user?id=7)"
+
+
+def test_mention_of_a_name_made_only_of_markdown():
+    assert _LINK_RE.match(bot.mention_markdown(7, "**__"))
+
+
+def test_chunks_respect_mention_limit():
+    coalescer = bot.JoinCoalescer(window=1, max_mentions=2, delete_previous=False)
+    mentions = [bot.mention_markdown(i, f"Trader{i}") for i in range(5)]
+    chunks = list(coalescer._chunks("Welcome {mentions}", mentions))
+    assert [chunk.count("tg://user") for chunk in chunks] == [2, 2, 1]
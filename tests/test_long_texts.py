@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+import bot
+
+TEXT = (
+    "Gold hit a record today. Traders expect more gains!\n\n"
+    "Is the rally over? Analysts disagree… Silver followed.\n"
+    "Oil fell sharply after the report"
+)
+
+
+@pytest.mark.parametrize("max_chars", [20, 40, 60, 1000])
+def test_split_sentences_round_trips(max_chars):
+    chunks = bot.split_sentences(TEXT, max_chars)
+    assert "".join(chunk + separator for chunk, separator in chunks) == TEXT
+    for chunk, _ in chunks:
+        # Só passa do limite uma frase que sozinha já é maior que ele
+        assert len(chunk) <= max_chars or not bot._SENTENCE_BREAK_RE.search(chunk)
+
+
+def test_split_sentences_keeps_short_text_whole():
+    assert bot.split_sentences("gm. gn.", 100) == [("gm. gn.", "")]
+
+
+def test_translate_long_reassembles_in_order(monkeypatch):
+    async def translate_async(text, target, source="en"):
+        await asyncio.sleep(0.01 if "Gold" in text else 0)  # o primeiro pedaço volta por último
+        return text.upper()
+
+    split = bot.split_sentences
+    monkeypatch.setattr(bot, "split_sentences", lambda text: split(text, 40))
+    monkeypatch.setattr(bot, "translate_async", translate_async)
+    assert asyncio.run(bot.translate_long(TEXT, "pt")) == TEXT.upper()
+
+
+def test_paginate_packs_blocks_up_to_the_limit():
+    assert bot.paginate(["a" * 10, "b" * 10, "c" * 10], limit=25) == ["a" * 10 + "\n\n" + "b" * 10, "c" * 10]
+
+
+def test_paginate_cuts_big_blocks_at_the_best_break():
+    by_line = bot.paginate(["first line\nsecond line is long"], limit=20)
+    assert by_line == ["first line", "second line is long"]
+
+    by_sentence = bot.paginate(["One two. Three four five six"], limit=20)
+    assert by_sentence == ["One two.", "Three four five six"]
+
+    by_word = bot.paginate(["alpha beta gamma delta"], limit=12)
+    assert by_word == ["alpha beta", "gamma delta"]
+
+    hard = bot.paginate(["x" * 25], limit=10)
+    assert hard == ["x" * 10, "x" * 10, "x" * 5]
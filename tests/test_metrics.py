@@ -0,0 +1,20 @@
+import bot
+
+
+def test_cache_lookups_are_counters_and_size_is_a_gauge():
+    cache = bot.TranslationCache("", max_size=10, ttl=60)
+    before = {r: bot.metrics.counter_total("translation_cache_lookups_total", result=r) for r in ("hit", "miss")}
+    key = cache.make_key("gm", "pt", "en")
+    assert cache.get(key) is None
+    cache.put(key, "bom dia")
+    assert cache.get(key) == "bom dia"
+
+    assert bot.metrics.counter_total("translation_cache_lookups_total", result="hit") == before["hit"] + 1
+    assert bot.metrics.counter_total("translation_cache_lookups_total", result="miss") == before["miss"] + 1
+
+    text = bot.metrics.render()
+    assert "# TYPE apex_translation_cache_lookups_total counter" in text
+    assert "# TYPE apex_translation_cache_size gauge" in text
+    # Nada monotônico exportado como gauge
+    for name in ("translation_cache_hits", "broadcast_sent", "translation_hedges", "translation_batch_batches"):
+        assert f"apex_{name} " not in text and f"apex_{name}{{" not in text
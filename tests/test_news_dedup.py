@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+
+import bot
+
+FEEDS = [
+    {"name": "a", "label": "A", "url": "http://a", "chats": [1], "limit": 10},
+    {"name": "b", "label": "B", "url": "http://b", "chats": [2], "limit": 10},
+]
+
+
+class Fetcher:
+    def __init__(self, entries: dict):
+        self.entries = entries
+
+    async def fetch(self, url):
+        return self.entries[url]
+
+
+@pytest.fixture
+def news(monkeypatch):
+    store = bot.SentNewsStore("", retention_days=30, max_entries=100)
+    monkeypatch.setattr(bot, "sent_news", store)
+    monkeypatch.setattr(bot, "NEWS_FEEDS", FEEDS)
+
+    def fetch(entries):
+        monkeypatch.setattr(bot, "feed_fetcher", Fetcher(entries))
+        return asyncio.run(bot._fetch_news_stories())[0]
+
+    return store, fetch
+
+
+def test_same_story_from_two_feeds_is_merged(news):
+    _, fetch = news
+    stories = fetch({
+        "http://a": [{"id": "a1", "title": "Gold prices rise", "link": "http://a/1"}],
+        "http://b": [{"id": "b1", "title": "Gold Prices Rise!", "link": "http://b/1"}],
+    })
+    assert len(stories) == 1
+    story = next(iter(stories.values()))
+    assert story["ids"] == {"a1", "b1"} and story["chats"] == [1, 2]
+
+
+def test_fingerprint_expires_long_before_the_ids(news, monkeypatch):
+    store, fetch = news
+    fingerprint = bot.title_fingerprint("Gold prices rise")
+    store.add("a1")
+    store.add(fingerprint)
+    entries = {"http://a": [{"id": "a2", "title": "Gold Prices Rise!", "link": "http://a/2"}], "http://b": None}
+    assert fetch(entries) == {}  # mesma manchete, outra fonte, poucas horas depois
+
+    later = time.time() + bot.NEWS_FINGERPRINT_HOURS * 3600 + 1
+    monkeypatch.setattr(bot.time, "time", lambda: later)
+    assert list(fetch(entries)) == [fingerprint]  # dias depois é notícia nova
+    assert "a1" in store  # o ID continua na janela de NEWS_RETENTION_DAYS
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import bot
+
+
+def ny(day, hour, minute=0):
+    """Horário de Nova York na semana de 12/10/2026 (dia 12 é segunda)."""
+    return datetime(2026, 10, day, hour, minute, tzinfo=bot.MARKET_TIMEZONE)
+
+
+@pytest.fixture
+def scheduler():
+    return bot.NewsScheduler(["08:30", "10:00", "14:00"], jitter=0)
+
+
+@pytest.mark.parametrize("now, mode", [
+    (ny(12, 8, 25), "release"),   # 5 min antes da divulgação
+    (ny(12, 8, 49), "release"),
+    (ny(12, 8, 50), "active"),
+    (ny(12, 3), "active"),        # abertura de Londres
+    (ny(12, 2, 59), "idle"),
+    (ny(12, 17, 30), "idle"),
+    (ny(16, 16, 59), "active"),
+    (ny(16, 17), "closed"),       # sexta 17h fecha
+    (ny(17, 12), "closed"),
+    (ny(18, 17, 59), "closed"),
+    (ny(18, 18), "idle"),         # domingo 18h reabre
+])
+def test_mode_follows_the_market_clock(scheduler, now, mode):
+    assert scheduler.mode(now) == mode
+
+
+def test_mode_converts_from_utc(scheduler):
+    assert scheduler.mode(datetime(2026, 10, 12, 12, 40, tzinfo=timezone.utc)) == "release"  # 08:40 EDT
+
+
+def test_quiet_feed_stretches_up_to_four_times(scheduler):
+    now = ny(12, 11)
+    assert scheduler.next_delay(None, now) == bot.NEWS_INTERVAL_ACTIVE
+    assert scheduler.next_delay("quiet", now) == bot.NEWS_INTERVAL_ACTIVE * 1.25
+    for _ in range(20):
+        delay = scheduler.next_delay("quiet", now)
+    assert delay == bot.NEWS_INTERVAL_ACTIVE * 4
+    assert scheduler.next_delay("new", now) == bot.NEWS_INTERVAL_ACTIVE
+    # Na divulgação o feed parado não alonga nada
+    scheduler.next_delay("quiet", now)
+    assert scheduler.next_delay("quiet", ny(12, 10, 5)) == bot.NEWS_INTERVAL_RELEASE
+
+
+def test_errors_back_off_up_to_the_cap(scheduler):
+    now = ny(12, 11)
+    assert scheduler.next_delay("error", now) == bot.NEWS_INTERVAL_ACTIVE * 2
+    assert scheduler.next_delay("error", now) == bot.NEWS_INTERVAL_ACTIVE * 4
+    for _ in range(10):
+        delay = scheduler.next_delay("error", now)
+    assert delay == bot.NEWS_INTERVAL_MAX
+    assert scheduler.next_delay("new", now) == bot.NEWS_INTERVAL_ACTIVE
+
+
+def test_wakes_up_when_a_faster_mode_starts(scheduler):
+    # 02:55 é Ásia (espera longa), mas Londres abre às 03:00
+    assert scheduler.next_delay(None, ny(12, 2, 55)) == 300
+    # 08:20: a janela da divulgação das 08:30 começa às 08:25
+    scheduler.quiet_streak = 10
+    assert scheduler.next_delay(None, ny(12, 8, 20)) == 300
+
+
+def test_jitter_stays_within_ten_percent():
+    scheduler = bot.NewsScheduler([])
+    for _ in range(50):
+        delay = scheduler.next_delay(None, ny(12, 11))
+        assert 0.9 * bot.NEWS_INTERVAL_ACTIVE <= delay <= 1.1 * bot.NEWS_INTERVAL_ACTIVE
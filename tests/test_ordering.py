@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from telegram import Update
+
+import bot
+from fake_bot_api import callback_update, start_webhook, stop_app, text_update
+
+
+async def _wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condição não atingida a tempo")
+        await asyncio.sleep(0.02)
+
+
+class SlowProvider(bot.TranslationProvider):
+    """Marca o texto com o idioma depois de `delays[texto]` segundos e mede a concorrência."""
+
+    name = "slow"
+
+    def __init__(self, delays: dict):
+        self.delays = delays
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delays.get(text, 0))
+            return f"[{target}] {text}"
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def providers():
+    original = bot.translation_router.providers
+    yield bot.translation_router.set_providers
+    bot.translation_router.set_providers(original)
+
+
+def test_replies_keep_chat_order_while_translating_in_parallel(api, free_port, providers):
+    texts = [f"Gold is pumping now, message {n}" for n in ("one", "two", "three", "four")]
+    # A primeira mensagem é a mais lenta: sem a ordem por chat, a resposta dela sairia por último
+    provider = SlowProvider({text: 0.4 - i * 0.1 for i, text in enumerate(texts)})
+    providers([provider])
+
+    async def scenario():
+        app = bot.build_application(base_url=api.base_url)
+        await start_webhook(app, free_port, f"http://127.0.0.1:{free_port}")
+        try:
+            updates = [text_update(-100, text) for text in texts]
+            for update in updates:
+                assert await api.post_update(update) == 200
+            await _wait_until(lambda: api.count("sendMessage") == len(updates))
+        finally:
+            await stop_app(app)
+        replied = [params["reply_parameters"]["message_id"] for params in api.calls_to("sendMessage")]
+        assert replied == [update["message"]["message_id"] for update in updates]
+
+    asyncio.run(scenario())
+    assert provider.max_running > 1  # as traduções não ficaram na fila do chat
+
+
+@pytest.mark.parametrize("slots", [1, 2])
+def test_processor_orders_each_chat_without_blocking_others(slots):
+    async def scenario():
+        processor = bot.ChatOrderedUpdateProcessor(max_concurrent_updates=slots, max_pending=100)
+        handled = []
+
+        async def handle(update, delay):
+            await asyncio.sleep(delay)
+            await bot.wait_chat_turn()
+            handled.append(update.update_id)
+
+        updates = [
+            Update.de_json(text_update(-100, "first message"), None),
+            Update.de_json(text_update(-100, "/status"), None),
+            Update.de_json(text_update(-100, "third message"), None),
+            Update.de_json(text_update(-200, "other chat"), None),
+            Update.de_json(callback_update(7, "lang_en"), None),
+        ]
+        delays = [0.2, 0.05, 0.0, 0.0, 0.0]
+        # Com uma vaga só, a terceira mensagem espera a vez sem segurar a vaga do comando
+        await asyncio.wait_for(
+            asyncio.gather(*(processor.process_update(u, handle(u, d)) for u, d in zip(updates, delays))), 5
+        )
+        chat_100 = [u.update_id for u in updates[:3]]
+        assert [uid for uid in handled if uid in chat_100] == chat_100
+        if slots > 1:
+            assert handled.index(updates[3].update_id) < handled.index(updates[0].update_id)
+        assert not processor._tails
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import bot
+
+
+class Failing(bot.TranslationProvider):
+    name = "failing"
+
+    def __init__(self):
+        self.calls = 0
+
+    def translate(self, text, source, target):
+        self.calls += 1
+        raise RuntimeError("fora do ar")
+
+
+class Hung(bot.TranslationProvider):
+    """Fica preso até `release` ser sinalizado, como uma conexão travada."""
+
+    name = "hung"
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def translate(self, text, source, target):
+        self.release.wait(10)
+        return "tarde demais"
+
+
+@pytest.fixture
+def router():
+    return bot.TranslationRouter([], timeout=0.3, hedge_after=0, max_failures=3, reset=30)
+
+
+def test_circuit_breaker_opens_then_allows_one_probe():
+    breaker = bot.CircuitBreaker(max_failures=2, reset=0.05)
+    breaker.failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # só uma chamada de teste por vez
+    breaker.failure()
+    assert breaker.state == "open" and breaker.trips == 1
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_router_skips_open_circuit(router):
+    failing = Failing()
+    router.set_providers([failing, bot.StubProvider()])
+
+    async def scenario():
+        for i in range(6):
+            assert await router.translate([f"hello {i}"], "pt") == [f"[pt] hello {i}"]
+
+    asyncio.run(scenario())
+    assert failing.calls == 3
+    assert router.breakers["failing"].state == "open"
+
+
+def test_hung_provider_does_not_starve_the_fallback(router):
+    hung = Hung()
+    hung.workers = 2
+    router.set_providers([hung, bot.StubProvider()])
+
+    async def scenario():
+        return await asyncio.gather(*(router.translate([f"text {i}"], "pt") for i in range(12)))
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        hung.release.set()
+    assert results == [[f"[pt] text {i}"] for i in range(12)]
+    assert router.breakers["stub"].state == "closed"
+
+
+def test_only_provider_queues_when_busy(router):
+    class Slow(bot.StubProvider):
+        workers = 1
+
+        def translate(self, text, source, target):
+            time.sleep(0.02)
+            return super().translate(text, source, target)
+
+    router.set_providers([Slow()])
+
+    async def scenario():
+        return await asyncio.gather(*(router.translate([f"text {i}"], "pt") for i in range(5)))
+
+    assert asyncio.run(scenario()) == [[f"[pt] text {i}"] for i in range(5)]
+
+
+def test_http_calls_get_a_socket_timeout():
+    class FakeRequests:
+        def get(self, url, **kwargs):
+            return kwargs
+
+    wrapped = bot._RequestsWithTimeout(FakeRequests(), 5)
+    assert wrapped.get("http://x")["timeout"] == 5
+    assert wrapped.get("http://x", timeout=1)["timeout"] == 1
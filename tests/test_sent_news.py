@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+import bot
+
+
+@pytest.fixture(autouse=True)
+def no_legacy_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot, "SENT_NEWS_FILE", str(tmp_path / "sent_news.txt"))
+
+
+def store(tmp_path, **kwargs):
+    options = {"retention_days": 30, "max_entries": 100, "snapshot_path": str(tmp_path / "news.snapshot")}
+    options.update(kwargs)
+    return bot.SentNewsStore(str(tmp_path / "news.db"), **options)
+
+
+def test_snapshot_round_trip_plus_rows_written_after_it(tmp_path):
+    first = store(tmp_path)
+    first.load()
+    first.add("a")
+    first.add("b")
+    first.flush()
+    first.save_snapshot()
+    first.add("c")  # depois do snapshot: só no banco
+    first.flush()
+
+    second = store(tmp_path)
+    second.load()
+    assert "a" in second and "b" in second and "c" in second
+    assert len(second) == 3
+    assert second._seen == first._seen
+
+
+def test_corrupt_snapshot_falls_back_to_the_database(tmp_path):
+    first = store(tmp_path)
+    first.add("a")
+    first.flush()
+    (tmp_path / "news.snapshot").write_bytes(b"lixo")
+
+    second = store(tmp_path)
+    assert "a" in second
+
+
+def test_prune_by_retention_and_size(tmp_path, monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(bot.time, "time", lambda: now)
+    news = store(tmp_path, retention_days=1, max_entries=3)
+    news.add("old")
+    news.flush()
+    now += 86400 + 1
+    news.add("a")
+    news.flush()
+    assert "old" not in news and len(news) == 1  # saiu pela retenção
+
+    for news_id in ("b", "c", "d"):
+        news.add(news_id)
+    news.flush()
+    assert "a" not in news  # saiu pelo tamanho
+    assert [n for n in ("b", "c", "d") if n in news] == ["b", "c", "d"]
+    db = sqlite3.connect(str(tmp_path / "news.db"))
+    assert db.execute("SELECT COUNT(*) FROM sent_news").fetchone()[0] == 3
+
+
+def test_legacy_file_is_migrated_once(tmp_path):
+    legacy = tmp_path / "sent_news.txt"
+    legacy.write_text("x\ny\n\n")
+    news = store(tmp_path)
+    news.load()
+    assert "x" in news and "y" in news
+    assert not legacy.exists()
+    assert (tmp_path / "sent_news.txt.migrated").exists()
+    assert "x" in store(tmp_path)  # gravado no banco
@@ -0,0 +1,19 @@
+import asyncio
+
+import pytest
+from telegram.ext import ApplicationBuilder
+
+import bot
+
+
+def test_sigterm_before_start_exits_instead_of_marking(monkeypatch):
+    monkeypatch.setattr(bot, "drain_task", None)
+    app = ApplicationBuilder().token("123456:TEST").updater(None).build()
+
+    async def scenario():
+        assert not app.running  # ainda no post_init / registrando o webhook
+        with pytest.raises(SystemExit):
+            bot._on_sigterm(app)
+
+    asyncio.run(scenario())
+    assert bot.drain_task is None
@@ -0,0 +1,63 @@
+import pytest
+
+import bot
+
+
+def test_write_behind_set_tracks_changes_and_survives_replace():
+    chats = bot.WriteBehindSet({1, 2})
+    chats.add(1)  # já estava: nada para gravar
+    chats.add(3)
+    chats.discard(2)
+    chats.discard(99)
+    assert chats.dirty == {3: True, 2: False}
+
+    chats.replace({1, 2, 4})  # releitura do backend, ainda sem o flush local
+    assert chats == {1, 3, 4}
+    assert chats.dirty == {3: True, 2: False}
+
+
+def test_write_behind_dict_tracks_changes_and_survives_replace():
+    languages = bot.WriteBehindDict({1: "pt", 2: "es"})
+    languages[1] = "pt"
+    languages[3] = "en"
+    del languages[2]
+    assert languages.dirty == {3: "en", 2: None}
+
+    languages.replace({1: "es", 2: "es", 4: "pt"})
+    assert languages == {1: "es", 3: "en", 4: "pt"}
+
+
+def test_sqlite_backend_round_trip(tmp_path):
+    path = str(tmp_path / "state.db")
+    backend = bot.SqliteStateBackend(path)
+    backend.save({1: True, 2: True}, {10: "pt", 11: "es"})
+    backend.save({2: False}, {11: None, 12: "en"})
+
+    chats, languages = bot.SqliteStateBackend(path).load()
+    assert chats == {1}
+    assert languages == {10: "pt", 12: "en"}
+    assert backend.load_chats() == {1}
+
+
+def test_failed_flush_keeps_changes_for_the_next_one(monkeypatch):
+    chats, languages = bot.WriteBehindSet(), bot.WriteBehindDict()
+
+    class FailingBackend:
+        def save(self, saved_chats, saved_languages):
+            # O loop continua mexendo no estado enquanto a gravação roda
+            chats.discard(1)
+            languages[7] = "es"
+            raise OSError("disco cheio")
+
+    monkeypatch.setattr(bot, "active_chats", chats)
+    monkeypatch.setattr(bot, "user_language", languages)
+    monkeypatch.setattr(bot, "state_backend", FailingBackend())
+    chats.add(1)
+    chats.add(2)
+    languages[7] = "pt"
+
+    with pytest.raises(OSError):
+        bot.flush_state()
+    # O mais novo vale sobre o que falhou
+    assert chats.dirty == {1: False, 2: True}
+    assert languages.dirty == {7: "es"}
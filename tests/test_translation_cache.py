@@ -0,0 +1,39 @@
+import threading
+
+import bot
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    path = str(tmp_path / "translations.db")
+    cache = bot.TranslationCache(path, max_size=2, ttl=3600)
+    key = bot.TranslationCache.make_key("Good  Morning", "pt", "en")
+    assert key == bot.TranslationCache.make_key("good morning ", "pt", "en")
+    assert cache.get(key) is None
+    cache.put(key, "Bom dia")
+    assert cache.get(key, disk=False) == "Bom dia"
+
+    # Outro processo (ou um restart) só tem o disco
+    fresh = bot.TranslationCache(path, max_size=2, ttl=3600)
+    assert fresh.get(key, disk=False) is None
+    assert fresh.get(key) == "Bom dia"
+    assert fresh.get(key, disk=False) == "Bom dia"
+    assert (fresh.hits, fresh.disk_hits, fresh.misses) == (1, 1, 0)
+
+
+def test_lru_evicts_oldest():
+    cache = bot.TranslationCache("", max_size=2, ttl=3600)
+    for key in ("a", "b", "c"):
+        cache.put(key, key.upper())
+    assert cache.get("a", disk=False) is None
+    assert cache.get("c", disk=False) == "C"
+
+
+def test_memory_lookup_does_not_wait_for_sqlite(tmp_path):
+    cache = bot.TranslationCache(str(tmp_path / "translations.db"), max_size=10, ttl=3600)
+    cache.put("k", "v")
+    with cache._db_lock:  # o disco ocupado (prune, put) não segura a consulta à memória
+        result = []
+        thread = threading.Thread(target=lambda: result.append(cache.get("k", disk=False)))
+        thread.start()
+        thread.join(timeout=1)
+        assert result == ["v"]
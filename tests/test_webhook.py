@@ -0,0 +1,26 @@
+import asyncio
+
+import bot
+from fake_bot_api import start_webhook, stop_app, text_update
+
+SECRET = "right-secret"
+
+
+def test_webhook_rejects_wrong_secret(api, free_port):
+    async def scenario():
+        app = bot.build_application(base_url=api.base_url)
+        await start_webhook(app, free_port, f"http://127.0.0.1:{free_port}", secret_token=SECRET)
+        try:
+            update = text_update(-100, "Gold is pumping now")
+            assert await api.post_update(update, secret="wrong-secret") == 403
+            assert await api.post_update(update, secret="") == 403  # sem o cabeçalho
+            assert await api.post_update(update, secret=SECRET) == 200
+        finally:
+            await stop_app(app)
+
+    asyncio.run(scenario())
+
+
+def test_allowed_updates_only_lists_handled_types():
+    app = bot.build_application()
+    assert bot.allowed_updates_for(app) == ["callback_query", "chat_member", "message"]